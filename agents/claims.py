@@ -0,0 +1,106 @@
+"""Claim extraction and vectorized evidence matching for the verifier."""
+from __future__ import annotations
+
+import re
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    import numpy as np
+
+NOT_FOUND = "Not found in sources."
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+# Claims shorter than this are too short for a reliable embedding match; they are
+# always sent to the LLM (which may answer "OK" for greetings and sign-offs).
+MIN_MATCH_WORDS = 5
+# Specifics an embedding match cannot check: a topical sentence with a made-up figure,
+# date or name scores as high as a supported one. Digits (numbers, percentages, years,
+# quarters), month names, acronyms, and capitalized words after the first (names).
+_SPECIFIC = re.compile(
+    r"\d|%|\bpercent\b"
+    r"|\b(?:January|February|March|April|May|June|July|August|September|October|November|December)\b"
+    r"|\b[A-Z]{2,}\b|(?<=\s)[A-Z][a-z]"
+)
+
+
+def _is_claim(text: str) -> bool:
+    text = text.strip()
+    return any(c.isalnum() for c in text) and text != NOT_FOUND
+
+
+def embedding_matchable(claim: dict[str, Any]) -> bool:
+    """True if the claim may be accepted on embedding similarity alone: long enough and with no specifics to check."""
+    text = claim["text"]
+    return len(text.split()) >= MIN_MATCH_WORDS and not _SPECIFIC.search(text)
+
+
+def _sentences(text: str) -> list[list[str]]:
+    """Split text into lines of sentences, keeping line structure for reassembly."""
+    return [_SENTENCE_END.split(line) if line.strip() else [line] for line in text.split("\n")]
+
+
+def extract_claims(draft: dict[str, Any]) -> list[dict[str, Any]]:
+    """
+    Split the draft into checkable claims: every sentence and action item task is one.
+
+    Each claim is a dict with "text" and a "loc" tuple pointing back into the draft:
+    (field, line, sentence) for executive_summary / client_email, and
+    ("action_items", item index) for action item tasks.
+    """
+    claims = []
+    for field in ("executive_summary", "client_email"):
+        text = draft.get(field)
+        if not isinstance(text, str):
+            continue
+        for li, line in enumerate(_sentences(text)):
+            for si, sentence in enumerate(line):
+                if _is_claim(sentence):
+                    claims.append({"text": sentence.strip(), "loc": (field, li, si)})
+    for idx, item in enumerate(draft.get("action_items") or []):
+        task = item.get("task", "") if isinstance(item, dict) else ""
+        if _is_claim(task):
+            claims.append({"text": task.strip(), "loc": ("action_items", idx)})
+    return claims
+
+
+def match_claims(claim_vecs: np.ndarray, source_vecs: np.ndarray) -> np.ndarray:
+    """
+    Score every claim against every source with one matrix product.
+
+    Both inputs are row vectors; they are L2-normalized here so the returned
+    (claims x sources) matrix holds cosine similarities.
+    """
+    import numpy as np
+
+    claim_vecs = claim_vecs / np.maximum(np.linalg.norm(claim_vecs, axis=1, keepdims=True), 1e-12)
+    source_vecs = source_vecs / np.maximum(np.linalg.norm(source_vecs, axis=1, keepdims=True), 1e-12)
+    return claim_vecs @ source_vecs.T
+
+
+def apply_verdicts(draft: dict[str, Any], claims: list[dict[str, Any]]) -> dict[str, Any]:
+    """Return a copy of the draft with every claim whose status is "unsupported" replaced by NOT_FOUND."""
+    out = dict(draft)
+    rejected = {c["loc"] for c in claims if c["status"] == "unsupported"}
+    for field in ("executive_summary", "client_email"):
+        text = draft.get(field)
+        if not isinstance(text, str):
+            continue
+        lines = []
+        for li, line in enumerate(_sentences(text)):
+            kept: list[str] = []
+            for si, sentence in enumerate(line):
+                if (field, li, si) in rejected:
+                    # Collapse runs of rejected sentences into one marker.
+                    if not kept or kept[-1] != NOT_FOUND:
+                        kept.append(NOT_FOUND)
+                else:
+                    kept.append(sentence)
+            lines.append(" ".join(kept))
+        out[field] = "\n".join(lines)
+    items = []
+    for idx, item in enumerate(draft.get("action_items") or []):
+        if isinstance(item, dict) and ("action_items", idx) in rejected:
+            item = {**item, "task": NOT_FOUND}
+        items.append(item)
+    out["action_items"] = items
+    return out
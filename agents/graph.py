@@ -1,28 +1,52 @@
 """LangGraph workflow: Plan → Research → Write → Verify → Deliver."""
 from __future__ import annotations
 
+import time
+import uuid
+from functools import lru_cache
 from typing import Any, Dict, List, Optional
 
-from langgraph.graph import END, StateGraph
+from config import settings
+from retrieval.index_manager import get_corpus_registry
 
+from .guard import PromptInjectionError, screen_request
+from .llm import is_transient_error
 from .state import GraphState
 from .planner import planner_node
 from .researcher import researcher_node
 from .writer import writer_node
 from .verifier import verifier_node
 
+# Start time of every run that has checkpoints, kept next to LangGraph's tables so
+# failed or abandoned runs can be expired (finished runs are deleted at once).
+_RUN_THREADS_SCHEMA = "CREATE TABLE IF NOT EXISTS run_threads (thread_id TEXT PRIMARY KEY, started_at REAL NOT NULL)"
 
-def build_workflow():
+
+def build_workflow(checkpointer=None):
     """
     Build the LangGraph workflow implementing:
     Plan → Research → Draft → Verify → Deliver
+
+    Each node retries transient OpenAI errors (timeouts, rate limits, 5xx) with
+    backoff. With a checkpointer, state is saved after every node so a run that
+    still fails can be resumed from the last completed node.
     """
+    # langgraph is imported here rather than at module level so importing
+    # agents.graph (and the Streamlit app) does not pay for it at startup.
+    from langgraph.graph import END, StateGraph
+    from langgraph.types import RetryPolicy
+
+    retry = RetryPolicy(
+        max_attempts=settings.node_max_attempts,
+        initial_interval=1.0,
+        retry_on=is_transient_error,
+    )
     workflow = StateGraph(GraphState)
 
-    workflow.add_node("planner", planner_node)
-    workflow.add_node("researcher", researcher_node)
-    workflow.add_node("writer", writer_node)
-    workflow.add_node("verifier", verifier_node)
+    workflow.add_node("planner", planner_node, retry_policy=retry)
+    workflow.add_node("researcher", researcher_node, retry_policy=retry)
+    workflow.add_node("writer", writer_node, retry_policy=retry)
+    workflow.add_node("verifier", verifier_node, retry_policy=retry)
 
     workflow.set_entry_point("planner")
     workflow.add_edge("planner", "researcher")
@@ -30,10 +54,76 @@ def build_workflow():
     workflow.add_edge("writer", "verifier")
     workflow.add_edge("verifier", END)
 
-    graph = workflow.compile()
+    graph = workflow.compile(checkpointer=checkpointer)
     return graph
 
 
+def _get_checkpointer():
+    """SQLite checkpointer shared by all runs in the process (threads are keyed by run_id)."""
+    import sqlite3
+
+    from langgraph.checkpoint.sqlite import SqliteSaver
+
+    settings.checkpoint_db.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(settings.checkpoint_db), check_same_thread=False)
+    saver = SqliteSaver(conn)
+    prune_checkpoints(saver, settings.checkpoint_max_age_days)
+    return saver
+
+
+def prune_checkpoints(saver, max_age_days: float) -> int:
+    """
+    Delete the checkpoints of runs started more than max_age_days ago; return how many runs.
+
+    Runs checkpointed before start times were recorded are dated from the first sweep
+    that sees them.
+    """
+    saver.setup()
+    now = time.time()
+    with saver.lock, saver.conn:
+        saver.conn.execute(_RUN_THREADS_SCHEMA)
+        saver.conn.execute("INSERT OR IGNORE INTO run_threads SELECT DISTINCT thread_id, ? FROM checkpoints", (now,))
+        expired = [
+            row[0]
+            for row in saver.conn.execute(
+                "SELECT thread_id FROM run_threads WHERE started_at < ?", (now - max_age_days * 86400,)
+            )
+        ]
+    for thread_id in expired:
+        saver.delete_thread(thread_id)
+    _forget_run(saver, expired)
+    return len(expired)
+
+
+def _remember_run(saver, run_id: str) -> None:
+    with saver.lock, saver.conn:
+        saver.conn.execute("INSERT OR IGNORE INTO run_threads VALUES (?, ?)", (run_id, time.time()))
+
+
+def _forget_run(saver, run_ids: List[str]) -> None:
+    with saver.lock, saver.conn:
+        saver.conn.executemany("DELETE FROM run_threads WHERE thread_id = ?", [(r,) for r in run_ids])
+
+
+@lru_cache(maxsize=1)
+def _get_workflow():
+    """Compile the workflow once per process; the compiled graph is reusable across runs."""
+    return build_workflow(checkpointer=_get_checkpointer())
+
+
+def new_run_id() -> str:
+    return uuid.uuid4().hex
+
+
+def _run_config(run_id: str) -> Dict[str, Any]:
+    return {"configurable": {"thread_id": run_id}}
+
+
+def is_resumable(run_id: str) -> bool:
+    """True if run_id has a checkpoint with nodes still to run (it failed or was interrupted)."""
+    return bool(run_id) and bool(_get_workflow().get_state(_run_config(run_id)).next)
+
+
 def _build_observability(trace: List[Dict[str, Any]]) -> Dict[str, Any]:
     per_agent = []
     total_latency_ms = 0
@@ -43,13 +133,13 @@ def _build_observability(trace: List[Dict[str, Any]]) -> Dict[str, Any]:
     total_errors = 0
 
     for event in trace:
-        output = event.get("output", {}) or {}
-        usage = output.get("token_usage", {}) or {}
-        latency = int(output.get("latency_ms", 0) or 0)
+        metrics = event.get("metrics", {}) or {}
+        usage = metrics.get("token_usage", {}) or {}
+        latency = int(metrics.get("latency_ms", 0) or 0)
         prompt_tokens = int(usage.get("prompt_tokens", 0) or 0)
         completion_tokens = int(usage.get("completion_tokens", 0) or 0)
         tokens = int(usage.get("total_tokens", prompt_tokens + completion_tokens) or 0)
-        errors = int(output.get("errors", 0) or 0)
+        errors = int(metrics.get("errors", 0) or 0)
 
         total_latency_ms += latency
         total_prompt_tokens += prompt_tokens
@@ -80,26 +170,74 @@ def _build_observability(trace: List[Dict[str, Any]]) -> Dict[str, Any]:
     }
 
 
+def _finish_run(result: Dict[str, Any], run_id: str) -> Dict[str, Any]:
+    """Drop the finished run's checkpoints and shape the graph result for callers."""
+    checkpointer = _get_workflow().checkpointer
+    checkpointer.delete_thread(run_id)
+    _forget_run(checkpointer, [run_id])
+    trace = result.get("trace", [])
+    observability = _build_observability(trace)
+    # The index version the answer was grounded on, so cached answers can be invalidated on re-ingest.
+    index_version = next(
+        (e["metrics"].get("index_version", "") for e in trace if e.get("agent") == "researcher"),
+        "",
+    )
+    return {
+        "verified_output": result.get("verified_output", {}),
+        "trace": trace,
+        "observability": observability,
+        "index_version": index_version,
+        "corpus": result.get("corpus", ""),
+        "run_id": run_id,
+    }
+
+
 def run_copilot(
     question: str,
     goal: str,
     output_mode: str = "executive",
     email_signer: str = "",
+    run_id: Optional[str] = None,
+    corpus: Optional[str] = None,
 ) -> Dict[str, Any]:
-    """Run the full workflow and return verified_output, trace, and observability."""
-    graph = build_workflow()
+    """
+    Run the full workflow and return verified_output, trace, observability, index_version, corpus, and run_id.
+
+    corpus selects the tenant's document set (default: settings.corpus); an unknown
+    corpus raises KeyError before any agent runs.
+
+    Pass a run_id to make the run resumable by the caller: if the run raises, the same
+    run_id can be given to resume_copilot() (or to run_copilot() again) to continue
+    from the last completed node instead of starting over. Raises PromptInjectionError
+    if the guard flags the question or goal.
+    """
+    run_id = run_id or new_run_id()
+    if is_resumable(run_id):
+        return resume_copilot(run_id)
+    flagged = screen_request(question, goal)
+    if flagged:
+        raise PromptInjectionError(flagged)
+    corpus = corpus or settings.corpus
+    # Validates the corpus and starts loading its index while the planner runs.
+    get_corpus_registry().manager(corpus).start()
     initial: Dict[str, Any] = {
+        "run_id": run_id,
+        "corpus": corpus,
         "question": question,
         "goal": goal,
         "output_mode": output_mode,
         "email_signer": (email_signer or "").strip(),
         "trace": [],
     }
-    result = graph.invoke(initial)
-    trace = result.get("trace", [])
-    observability = _build_observability(trace)
-    return {
-        "verified_output": result.get("verified_output", {}),
-        "trace": trace,
-        "observability": observability,
-    }
+    workflow = _get_workflow()
+    _remember_run(workflow.checkpointer, run_id)
+    result = workflow.invoke(initial, _run_config(run_id))
+    return _finish_run(result, run_id)
+
+
+def resume_copilot(run_id: str) -> Dict[str, Any]:
+    """Resume a failed or interrupted run from its last completed node; KeyError if there is none."""
+    if not is_resumable(run_id):
+        raise KeyError(f"No resumable run with id {run_id}")
+    result = _get_workflow().invoke(None, _run_config(run_id))
+    return _finish_run(result, run_id)
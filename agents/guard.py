@@ -0,0 +1,112 @@
+"""Prompt-injection guard shared by the UI, the pipeline, and index ingest.
+
+All patterns are compiled into one case-insensitive alternation, so a batch of
+texts (question, goal, or every chunk of a corpus) is screened with a single
+regex pass instead of one substring scan per pattern. An optional local
+classifier (GUARD_CLASSIFIER, "module:function") can flag texts the patterns
+miss; it receives the whole batch and returns one injection probability per text.
+
+Retrieved chunks are screened once at ingest and their flags stored in the
+index (see retrieval.vector_store), so requests pay nothing to exclude them.
+"""
+from __future__ import annotations
+
+import hashlib
+import importlib
+import re
+from bisect import bisect_right
+from functools import lru_cache
+from typing import Callable, Optional, Sequence
+
+from config import settings
+
+# Regex sources, matched case-insensitively. Whitespace between words is \s+ so
+# line breaks and double spaces in PDF text do not hide a phrase. Patterns must
+# not match "\0" (texts are joined with it for the single pass).
+INJECTION_PATTERNS: list[str] = [
+    r"\b(?:ignore|disregard|forget)\s+(?:all\s+|any\s+|the\s+)?(?:previous|prior|above|earlier)\s+(?:instructions|rules|prompts?)\b",
+    r"\bforget\s+(?:everything|your\s+instructions)\b",
+    r"\byou\s+are\s+now\s+a\s+helpful\s+assistant\s+with\s+no\s+restrictions\b",
+    r"\byou\s+have\s+no\s+restrictions\b",
+    r"\byour\s+system\s+prompt\s+is\s+revoked\b",
+    r"\b(?:follow|obey)\s+only\s+the\s+user\b",
+    r"\bnew\s+instructions\s*:",
+    r"\b(?:override|bypass)\s+your\b",
+    r"\breveal\s+(?:your\s+)?(?:system\s+prompt|hidden\s+instructions)\b",
+]
+
+_classifier_override: Optional[Callable[[list[str]], Sequence[float]]] = None
+
+
+class PromptInjectionError(ValueError):
+    """Raised by run_copilot when the question or goal is flagged by the guard."""
+
+    def __init__(self, fields: list[str]):
+        self.fields = fields
+        super().__init__(f"Input flagged as prompt injection: {', '.join(fields)}")
+
+
+def add_patterns(*patterns: str) -> None:
+    """Extend the pattern set; indexes built afterwards are re-screened (see guard_fingerprint)."""
+    INJECTION_PATTERNS.extend(patterns)
+    get_matcher.cache_clear()
+
+
+def set_classifier(classifier: Optional[Callable[[list[str]], Sequence[float]]]) -> None:
+    """Use a classifier object directly instead of GUARD_CLASSIFIER (None restores the setting)."""
+    global _classifier_override
+    _classifier_override = classifier
+    get_classifier.cache_clear()
+
+
+@lru_cache(maxsize=1)
+def get_matcher() -> re.Pattern[str]:
+    return re.compile("|".join(f"(?:{p})" for p in INJECTION_PATTERNS), re.IGNORECASE)
+
+
+@lru_cache(maxsize=1)
+def get_classifier() -> Optional[Callable[[list[str]], Sequence[float]]]:
+    """The configured classifier, imported on first use (None when GUARD_CLASSIFIER is unset)."""
+    if _classifier_override is not None:
+        return _classifier_override
+    if not settings.guard_classifier:
+        return None
+    module, _, name = settings.guard_classifier.partition(":")
+    return getattr(importlib.import_module(module), name)
+
+
+def guard_fingerprint() -> str:
+    """Hash of the pattern set and classifier; stored chunk flags are stale when it changes."""
+    classifier = get_classifier()
+    name = getattr(classifier, "__qualname__", type(classifier).__name__) if classifier else ""
+    key = "\n".join([*INJECTION_PATTERNS, f"{name}|{settings.guard_threshold}"])
+    return hashlib.sha1(key.encode()).hexdigest()[:12]
+
+
+def screen(texts: Sequence[str]) -> list[bool]:
+    """Return one flag per text: True if it looks like a prompt injection."""
+    flags = [False] * len(texts)
+    if not texts:
+        return flags
+    # One pass over all texts joined by "\0"; match offsets map back to their text.
+    starts = []
+    pos = 0
+    for text in texts:
+        starts.append(pos)
+        pos += len(text) + 1
+    for match in get_matcher().finditer("\0".join(texts)):
+        flags[bisect_right(starts, match.start()) - 1] = True
+    classifier = get_classifier()
+    if classifier is not None:
+        pending = [i for i, flagged in enumerate(flags) if not flagged and texts[i].strip()]
+        if pending:
+            scores = classifier([texts[i] for i in pending])
+            for i, score in zip(pending, scores):
+                flags[i] = float(score) >= settings.guard_threshold
+    return flags
+
+
+def screen_request(question: str, goal: str = "") -> list[str]:
+    """Names of the request fields ("question", "goal") flagged by the guard."""
+    fields = ("question", "goal")
+    return [field for field, flagged in zip(fields, screen([question or "", goal or ""])) if flagged]
@@ -1,7 +1,7 @@
 """Direct OpenAI chat call so we always get token usage from the API response."""
 from __future__ import annotations
 
-from openai import OpenAI
+from config import settings
 
 
 def invoke_openai_chat(
@@ -14,7 +14,17 @@ def invoke_openai_chat(
     usage_out = {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
     if not api_key:
         return "", usage_out
-    client = OpenAI(api_key=api_key)
+    # Imported on first call: the openai SDK is one of the slowest imports in the app.
+    from openai import OpenAI
+
+    # Bounded per request and not retried by the SDK: transient failures propagate so the
+    # graph's node retry policy retries them and the run can resume from its checkpoint.
+    client = OpenAI(
+        api_key=api_key,
+        base_url=settings.openai_base_url or None,
+        timeout=settings.llm_timeout_s,
+        max_retries=0,
+    )
     response = client.chat.completions.create(
         model=model,
         messages=messages,
@@ -33,3 +43,12 @@ def invoke_openai_chat(
             "total_tokens": getattr(u, "total_tokens", 0) or 0,
         }
     return content, usage_out
+
+
+def is_transient_error(exc: BaseException) -> bool:
+    """True for OpenAI errors worth retrying: timeouts, connection failures, rate limits, 5xx."""
+    import openai
+
+    if isinstance(exc, (openai.APITimeoutError, openai.APIConnectionError, openai.RateLimitError)):
+        return True
+    return isinstance(exc, openai.APIStatusError) and exc.status_code >= 500
@@ -6,8 +6,9 @@ from typing import Any
 
 from config import settings
 
-from .llm import invoke_openai_chat
+from .llm import invoke_openai_chat, is_transient_error
 from .state import GraphState, PROMPT_INJECTION_DEFENSE
+from .trace_store import record_trace
 
 
 def planner_node(state: GraphState) -> dict[str, Any]:
@@ -37,22 +38,21 @@ def planner_node(state: GraphState) -> dict[str, Any]:
         if not plan:
             plan = "No plan generated."
     except Exception as e:
+        if is_transient_error(e):
+            raise  # retried by the graph's retry policy
         plan = f"Plan generation failed: {e}"
         errors = 1
     latency_ms = int((time.perf_counter() - start) * 1000)
     return {
         "plan": plan,
         "trace": [
-            {
-                "agent": "planner",
-                "notes": "Decomposed task into plan",
-                "input": {"question": state["question"], "goal": state["goal"]},
-                "output": {
-                    "plan": plan,
-                    "latency_ms": latency_ms,
-                    "token_usage": token_usage,
-                    "errors": errors,
-                },
-            }
+            record_trace(
+                state,
+                "planner",
+                "Decomposed task into plan",
+                input={"question": state["question"], "goal": state["goal"]},
+                output={"plan": plan},
+                metrics={"latency_ms": latency_ms, "token_usage": token_usage, "errors": errors},
+            )
         ],
     }
@@ -5,17 +5,23 @@ import time
 from typing import Any
 
 from config import settings
+from retrieval.shards import route_query
 from retrieval.vector_store import build_vector_store, search_sources
 
-from .llm import invoke_openai_chat
+from .llm import invoke_openai_chat, is_transient_error
 from .state import GraphState, PROMPT_INJECTION_DEFENSE
+from .trace_store import record_trace
 
 
 def researcher_node(state: GraphState) -> dict[str, Any]:
     """Retrieve relevant chunks and summarize with citations."""
-    store = build_vector_store()
+    store = build_vector_store(corpus=state.get("corpus"))
     query = f"{state['question']}\n{state.get('plan', '')}"
-    sources = search_sources(store, query, k=8)
+    # Route on the question alone: the plan mentions every topic it might research.
+    filters, prefer = (
+        route_query(state["question"], store.documents) if store is not None and settings.retrieval_routing else ({}, {})
+    )
+    sources = search_sources(store, query, k=8, filters=filters, prefer=prefer)
     source_text = "\n\n".join(
         f"[{s['citation']}]\n{s['note']}" for s in sources
     ) or "No sources found."
@@ -44,24 +50,34 @@ def researcher_node(state: GraphState) -> dict[str, Any]:
         if not research_notes:
             research_notes = "No research notes generated."
     except Exception as e:
+        if is_transient_error(e):
+            raise  # retried by the graph's retry policy
         research_notes = f"Research failed: {e}"
         errors = 1
     latency_ms = int((time.perf_counter() - start) * 1000)
     return {
         "research_notes": research_notes,
         "sources": sources,
+        "index_version": store.version if store is not None else "",
         "trace": [
-            {
-                "agent": "researcher",
-                "notes": "Retrieved and summarized sources",
-                "input": {"question": state["question"], "plan": state.get("plan", "")},
-                "output": {
-                    "research_notes": research_notes[:300],
+            record_trace(
+                state,
+                "researcher",
+                "Retrieved and summarized sources",
+                input={"question": state["question"], "plan": state.get("plan", ""), "filters": filters, "prefer": prefer},
+                output={
+                    "research_notes": research_notes,
+                    "sources": [s["citation"] for s in sources],
+                },
+                metrics={
                     "num_sources": len(sources),
+                    "corpus": state.get("corpus", ""),
+                    "index_version": store.version if store is not None else "",
+                    "context_tokens": sum(s.get("n_tokens", 0) for s in sources),
                     "latency_ms": latency_ms,
                     "token_usage": token_usage,
                     "errors": errors,
                 },
-            }
+            )
         ],
     }
@@ -0,0 +1,163 @@
+"""SQLite trace store: full agent inputs/outputs kept by reference, with size and age retention.
+
+Nodes record their full payload here and put only a lightweight event (id, agent,
+notes, metrics) into GraphState.trace. The UI loads payloads on demand by id, and
+the metrics columns can be queried for historical latency analysis.
+"""
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Optional
+
+from config import settings
+
+# Retention is enforced on open and then every PRUNE_EVERY writes.
+PRUNE_EVERY = 100
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS trace_events (
+    id TEXT PRIMARY KEY,
+    run_id TEXT NOT NULL,
+    agent TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    latency_ms INTEGER NOT NULL DEFAULT 0,
+    total_tokens INTEGER NOT NULL DEFAULT 0,
+    errors INTEGER NOT NULL DEFAULT 0,
+    metrics TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS trace_events_run ON trace_events (run_id);
+CREATE INDEX IF NOT EXISTS trace_events_created ON trace_events (created_at);
+"""
+
+
+class TraceStore:
+    """Append-mostly SQLite table of trace payloads; safe to share across threads and processes."""
+
+    def __init__(self, path: Path, max_age_days: float = 14.0, max_mb: float = 200.0):
+        self.path = Path(path)
+        self.max_age_days = max_age_days
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self.prune()
+
+    def record(
+        self,
+        run_id: str,
+        agent: str,
+        payload: dict[str, Any],
+        metrics: dict[str, Any],
+    ) -> str:
+        """Store a payload and its metrics; return the event id."""
+        event_id = uuid.uuid4().hex
+        body = json.dumps(payload, default=str)
+        usage = metrics.get("token_usage") or {}
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO trace_events VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    event_id,
+                    run_id,
+                    agent,
+                    time.time(),
+                    int(metrics.get("latency_ms", 0) or 0),
+                    int(usage.get("total_tokens", 0) or 0),
+                    int(metrics.get("errors", 0) or 0),
+                    json.dumps(metrics, default=str),
+                    body,
+                    len(body),
+                ),
+            )
+            self._writes += 1
+            prune = self._writes % PRUNE_EVERY == 0
+        if prune:
+            self.prune()
+        return event_id
+
+    def load(self, event_id: str) -> Optional[dict[str, Any]]:
+        """Full payload for an event id, or None if it was pruned."""
+        with self._lock:
+            row = self._conn.execute("SELECT payload FROM trace_events WHERE id = ?", (event_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def events(self, since: float | None = None, agent: str | None = None) -> list[dict[str, Any]]:
+        """Metrics rows (without payloads), oldest first, optionally filtered by time and agent."""
+        sql = "SELECT id, run_id, agent, created_at, latency_ms, total_tokens, errors FROM trace_events WHERE created_at >= ?"
+        args: list[Any] = [since or 0.0]
+        if agent:
+            sql += " AND agent = ?"
+            args.append(agent)
+        with self._lock:
+            rows = self._conn.execute(sql + " ORDER BY created_at", args).fetchall()
+        keys = ("id", "run_id", "agent", "created_at", "latency_ms", "total_tokens", "errors")
+        return [dict(zip(keys, row)) for row in rows]
+
+    def prune(self) -> int:
+        """Delete events older than max_age_days, then the oldest until payloads fit in max_mb."""
+        cutoff = time.time() - self.max_age_days * 86400
+        with self._lock, self._conn:
+            deleted = self._conn.execute("DELETE FROM trace_events WHERE created_at < ?", (cutoff,)).rowcount
+            total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM trace_events").fetchone()[0]
+            if total > self.max_bytes:
+                # Walk from the newest event and drop everything past the byte budget.
+                keep_from = self._conn.execute(
+                    "SELECT created_at FROM (SELECT created_at, SUM(size) OVER (ORDER BY created_at DESC) AS running "
+                    "FROM trace_events) WHERE running > ? ORDER BY created_at DESC LIMIT 1",
+                    (self.max_bytes,),
+                ).fetchone()
+                if keep_from:
+                    deleted += self._conn.execute(
+                        "DELETE FROM trace_events WHERE created_at <= ?", (keep_from[0],)
+                    ).rowcount
+        return deleted
+
+
+@lru_cache(maxsize=1)
+def get_trace_store() -> TraceStore:
+    return TraceStore(settings.trace_db, settings.trace_max_age_days, settings.trace_max_mb)
+
+
+def record_trace(
+    state: dict[str, Any],
+    agent: str,
+    notes: str,
+    input: dict[str, Any],
+    output: dict[str, Any],
+    metrics: dict[str, Any],
+) -> dict[str, Any]:
+    """
+    Store a node's full input/output and return the lean event to append to GraphState.trace.
+
+    The event carries only the id, agent, notes and small metrics. If the store is
+    unavailable the payload is kept inline so the trace is never lost.
+    """
+    event: dict[str, Any] = {"agent": agent, "notes": notes, "metrics": metrics}
+    try:
+        event["id"] = get_trace_store().record(
+            state.get("run_id", ""), agent, {"input": input, "output": output}, metrics
+        )
+    except Exception:
+        event["payload"] = {"input": input, "output": output}
+    return event
+
+
+def load_trace_payload(event: dict[str, Any]) -> dict[str, Any]:
+    """Full {"input", "output"} for a lean trace event (inline or from the store)."""
+    if "payload" in event:
+        return event["payload"]
+    try:
+        return get_trace_store().load(event.get("id", "")) or {}
+    except Exception:
+        return {}
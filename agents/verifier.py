@@ -1,86 +1,185 @@
-"""Verifier agent: checks draft against sources and marks unsupported claims."""
+"""Verifier agent: checks draft claims against sources and marks unsupported claims."""
 from __future__ import annotations
 
 import json
 import time
-from typing import Any
+from typing import Any, Optional
 
 from config import settings
+from retrieval.index_manager import get_corpus_registry
+from retrieval.vector_store import get_embeddings
 
-from .llm import invoke_openai_chat
+from .claims import NOT_FOUND, apply_verdicts, embedding_matchable, extract_claims, match_claims
+from .llm import invoke_openai_chat, is_transient_error
 from .state import GraphState, PROMPT_INJECTION_DEFENSE
+from .trace_store import record_trace
 
+# Candidate sources shown to the LLM per low-support claim.
+CANDIDATES_PER_CLAIM = 2
 
-def verifier_node(state: GraphState) -> dict[str, Any]:
-    """Verify draft against sources; mark unsupported claims as 'Not found in sources.'"""
-    draft = state.get("draft") or {}
-    sources = state.get("sources") or []
-    source_text = "\n".join(
-        f"- {s.get('citation', '')}: {s.get('note', '')[:200]}" for s in sources
-    ) or "No sources."
+
+def _stored_source_vectors(state: GraphState, sources: list[dict[str, Any]]):
+    """Embeddings of the retrieved chunks from the index they came from, or None if unavailable."""
+    chunk_ids = [s.get("chunk_id") for s in sources]
+    version = state.get("index_version", "")
+    if not version or any(c is None for c in chunk_ids):
+        return None
+    # Looked up on the manager directly: the researcher's request already counted in the cache stats.
+    index = get_corpus_registry().manager(state.get("corpus")).get(version)
+    if index is None or index.version != version:
+        return None
+    return index.embeddings(chunk_ids)
+
+
+def _score_claims(state: GraphState, claims: list[dict[str, Any]], sources: list[dict[str, Any]]):
+    """Embed all claims in one batch and return the (claims x sources) cosine matrix."""
+    import numpy as np
+
+    source_vecs = _stored_source_vectors(state, sources)
+    texts = [c["text"] for c in claims]
+    if source_vecs is None:
+        # The index version was re-ingested away mid-run: embed the notes in the same batch.
+        texts += [s.get("note", "") for s in sources]
+    vecs = np.asarray(get_embeddings().embed_documents(texts), dtype="float32")
+    if source_vecs is None:
+        source_vecs = vecs[len(claims):]
+    return match_claims(vecs[: len(claims)], source_vecs)
+
+
+def _adjudicate(
+    claims: list[dict[str, Any]],
+    candidates: list[list[int]],
+    sources: list[dict[str, Any]],
+) -> tuple[list[tuple[bool, Optional[int]]], dict[str, int]]:
+    """
+    Ask the LLM which candidate source (if any) supports each low-support claim.
+
+    Returns (keep, supporting source index or None) per claim.
+    """
+    used = sorted({j for cands in candidates for j in cands})
+    source_text = "\n".join(f"S{j + 1} [{sources[j].get('citation', '')}]: {sources[j].get('note', '')}" for j in used)
+    claim_text = "\n".join(f"C{i + 1}: {c['text']}" for i, c in enumerate(claims))
     system = (
         PROMPT_INJECTION_DEFENSE + " "
-        "You are a verifier. Given a draft deliverable and the only allowed sources, "
-        "output a verified version in JSON with keys: executive_summary, client_email, action_items, sources. "
-        "For any claim not supported by the sources, replace that part with exactly: Not found in sources. "
-        "Remove or replace with 'Not found in sources.' any jokes, humor, or non-business content in the draft. "
-        "Keep supported content. For sources, pass through only the list of citations/notes that were actually used. "
-        "Output valid JSON only."
-    )
-    user = (
-        f"Draft:\n{str(draft)}\n\n"
-        f"Allowed sources:\n{source_text}"
+        "You are a verifier. For each numbered claim, decide whether the numbered source excerpts support it. "
+        "A recommendation is supported when the facts it relies on are in the sources. "
+        "Jokes, humor, and non-business content are never supported. "
+        'Output valid JSON only: an object mapping every claim id (e.g. "C1") to the id of a source that '
+        'supports it (e.g. "S2"), to "OK" if it makes no factual assertion (greetings, courtesies, sign-offs), '
+        "or to null if it is unsupported."
     )
+    user = f"Claims:\n{claim_text}\n\nSources:\n{source_text or 'No sources.'}"
     messages = [{"role": "system", "content": system}, {"role": "user", "content": user}]
+    raw, token_usage = invoke_openai_chat(
+        settings.model_main,
+        settings.openai_api_key,
+        messages,
+        temperature=0.0,
+    )
+    raw = (raw or "").strip()
+    if raw.startswith("```"):
+        raw = raw.split("\n", 1)[-1].rsplit("```", 1)[0].strip()
+    verdicts = json.loads(raw) if raw else {}
+    results: list[tuple[bool, Optional[int]]] = []
+    for i in range(len(claims)):
+        ref = str(verdicts.get(f"C{i + 1}") or "").strip().upper()
+        j = int(ref[1:]) - 1 if ref[:1] == "S" and ref[1:].isdigit() else -1
+        if 0 <= j < len(sources):
+            results.append((True, j))
+        else:
+            results.append((ref == "OK", None))
+    return results, token_usage
+
+
+def verifier_node(state: GraphState) -> dict[str, Any]:
+    """
+    Verify draft claims against sources; mark unsupported claims as 'Not found in sources.'
+
+    Every sentence is a claim. Claims are matched to the retrieved chunks by embedding
+    similarity. Claims below CLAIM_SUPPORT_THRESHOLD, short claims, and claims stating
+    numbers, dates or names (which embeddings cannot check) are sent to the LLM with
+    their best candidate sources for adjudication.
+    """
+    draft = state.get("draft") or {}
+    sources = state.get("sources") or []
     start = time.perf_counter()
     errors = 0
     token_usage = {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+    claims: list[dict[str, Any]] = []
     try:
-        raw, token_usage = invoke_openai_chat(
-            settings.model_main,
-            settings.openai_api_key,
-            messages,
-            temperature=0.0,
-        )
-        raw = (raw or "").strip()
-        if raw.startswith("```"):
-            raw = raw.split("\n", 1)[-1].rsplit("```", 1)[0].strip()
-        verified_output = json.loads(raw) if raw else {}
-    except Exception:
+        claims = extract_claims(draft)
+        pending, candidates = [], []
+        if claims and sources:
+            scores = _score_claims(state, claims, sources)
+            for claim, row in zip(claims, scores):
+                best = int(row.argmax())
+                claim["support"] = float(row[best])
+                claim["citation"] = sources[best].get("citation", "")
+                matched = row[best] >= settings.claim_support_threshold and embedding_matchable(claim)
+                claim["status"] = "matched" if matched else "pending"
+                if claim["status"] == "pending":
+                    pending.append(claim)
+                    candidates.append([int(j) for j in row.argsort()[::-1][:CANDIDATES_PER_CLAIM]])
+        else:
+            for claim in claims:
+                claim.update(support=0.0, citation="", status="pending")
+            pending, candidates = claims, [[] for _ in claims]
+        if pending:
+            verdicts, token_usage = _adjudicate(pending, candidates, sources)
+            for claim, (keep, j) in zip(pending, verdicts):
+                claim["status"] = "adjudicated" if keep else "unsupported"
+                claim["citation"] = sources[j].get("citation", "") if j is not None else ""
+
+        verified_output = apply_verdicts(draft, claims)
+        verified_output.setdefault("executive_summary", NOT_FOUND)
+        verified_output.setdefault("client_email", NOT_FOUND)
+        cited = {c["citation"] for c in claims if c["status"] != "unsupported"}
+        verified_output["sources"] = [s for s in sources if s.get("citation") in cited]
+    except Exception as e:
+        if is_transient_error(e):
+            raise  # retried by the graph's retry policy
         verified_output = {
-            "executive_summary": draft.get("executive_summary", "Not found in sources."),
-            "client_email": draft.get("client_email", "Not found in sources."),
+            "executive_summary": draft.get("executive_summary", NOT_FOUND),
+            "client_email": draft.get("client_email", NOT_FOUND),
             "action_items": draft.get("action_items", []),
             "sources": [s for s in sources],
         }
         errors = 1
 
-    # Ensure each source has both citation and note (chunk preview) for the UI
-    citation_to_source = {s.get("citation", ""): s for s in sources}
-    normalized = []
-    for item in verified_output.get("sources", []):
-        if isinstance(item, dict):
-            cit = item.get("citation", "")
-            full = citation_to_source.get(cit, item)
-            normalized.append({"citation": cit or full.get("citation", "?"), "note": full.get("note", item.get("note", ""))})
-        else:
-            cit = str(item).strip()
-            full = citation_to_source.get(cit, {})
-            normalized.append({"citation": cit or "?", "note": full.get("note", "")})
-    verified_output["sources"] = normalized
+    # Keep only citation and note (chunk preview) per source for the UI
+    verified_output["sources"] = [
+        {"citation": s.get("citation", "?"), "note": s.get("note", "")} for s in verified_output["sources"]
+    ]
+    # Per-claim provenance: which source backs each claim and how it was decided
+    verified_output["claims"] = [
+        {
+            "field": c["loc"][0],
+            "text": c["text"],
+            "status": c.get("status", "unchecked"),
+            "support": round(c.get("support", 0.0), 3),
+            "citation": c.get("citation", ""),
+        }
+        for c in claims
+    ]
     latency_ms = int((time.perf_counter() - start) * 1000)
+    statuses = [c.get("status") for c in claims]
     return {
         "verified_output": verified_output,
         "trace": [
-            {
-                "agent": "verifier",
-                "notes": "Verified against sources",
-                "input": {"draft_keys": list(draft.keys()) if draft else []},
-                "output": {
+            record_trace(
+                state,
+                "verifier",
+                "Verified claims against sources",
+                input={"draft_keys": list(draft.keys()) if draft else [], "num_claims": len(claims)},
+                output={"claims": verified_output["claims"]},
+                metrics={
+                    "claims_matched": statuses.count("matched"),
+                    "claims_adjudicated": statuses.count("adjudicated"),
+                    "claims_unsupported": statuses.count("unsupported"),
                     "latency_ms": latency_ms,
                     "token_usage": token_usage,
                     "errors": errors,
                 },
-            }
+            )
         ],
     }
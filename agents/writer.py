@@ -8,8 +8,9 @@ from typing import Any
 
 from config import settings
 
-from .llm import invoke_openai_chat
+from .llm import invoke_openai_chat, is_transient_error
 from .state import GraphState, PROMPT_INJECTION_DEFENSE
+from .trace_store import record_trace
 
 
 def writer_node(state: GraphState) -> dict[str, Any]:
@@ -48,6 +49,8 @@ def writer_node(state: GraphState) -> dict[str, Any]:
         raw = re.sub(r"\n?```\s*$", "", raw)
         draft = json.loads(raw) if raw else {}
     except Exception as e:
+        if is_transient_error(e):
+            raise  # retried by the graph's retry policy
         draft = {
             "executive_summary": f"Draft generation failed: {e}",
             "client_email": "",
@@ -58,16 +61,13 @@ def writer_node(state: GraphState) -> dict[str, Any]:
     return {
         "draft": draft,
         "trace": [
-            {
-                "agent": "writer",
-                "notes": "Produced structured deliverable",
-                "input": {"output_mode": mode},
-                "output": {
-                    "draft_keys": list(draft.keys()) if isinstance(draft, dict) else [],
-                    "latency_ms": latency_ms,
-                    "token_usage": token_usage,
-                    "errors": errors,
-                },
-            }
+            record_trace(
+                state,
+                "writer",
+                "Produced structured deliverable",
+                input={"output_mode": mode},
+                output={"draft": draft},
+                metrics={"latency_ms": latency_ms, "token_usage": token_usage, "errors": errors},
+            )
         ],
     }
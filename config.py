@@ -16,9 +16,28 @@ class Settings(BaseSettings):
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
     openai_api_key: str = Field(default="", alias="OPENAI_API_KEY")
+    openai_base_url: str = Field(default="", alias="OPENAI_BASE_URL")
     model_main: str = Field(default="gpt-4.1-mini", alias="MODEL_MAIN")
     model_eval: str = Field(default="gpt-4.1-nano", alias="MODEL_EVAL")
     embedding_model: str = Field(default="text-embedding-3-large", alias="EMBEDDING_MODEL")
+    index_dir: Path = Field(default=PROJECT_ROOT / "data" / "index", alias="INDEX_DIR")
+    corpora_dir: Path = Field(default=PROJECT_ROOT / "data" / "corpora", alias="CORPORA_DIR")
+    corpus: str = Field(default="default", alias="CORPUS")
+    index_memory_cap_mb: float = Field(default=2048.0, alias="INDEX_MEMORY_CAP_MB")
+    chunk_tokens: int = Field(default=200, alias="CHUNK_TOKENS")
+    chunk_overlap_tokens: int = Field(default=40, alias="CHUNK_OVERLAP_TOKENS")
+    retrieval_routing: bool = Field(default=True, alias="RETRIEVAL_ROUTING")
+    index_watch_interval: float = Field(default=30.0, alias="INDEX_WATCH_INTERVAL")
+    claim_support_threshold: float = Field(default=0.5, alias="CLAIM_SUPPORT_THRESHOLD")
+    trace_db: Path = Field(default=PROJECT_ROOT / "data" / "traces.db", alias="TRACE_DB")
+    trace_max_age_days: float = Field(default=14.0, alias="TRACE_MAX_AGE_DAYS")
+    trace_max_mb: float = Field(default=200.0, alias="TRACE_MAX_MB")
+    checkpoint_db: Path = Field(default=PROJECT_ROOT / "data" / "checkpoints.db", alias="CHECKPOINT_DB")
+    checkpoint_max_age_days: float = Field(default=7.0, alias="CHECKPOINT_MAX_AGE_DAYS")
+    llm_timeout_s: float = Field(default=60.0, alias="LLM_TIMEOUT_S")
+    node_max_attempts: int = Field(default=3, alias="NODE_MAX_ATTEMPTS")
+    guard_classifier: str = Field(default="", alias="GUARD_CLASSIFIER")
+    guard_threshold: float = Field(default=0.5, alias="GUARD_THRESHOLD")
     eval_goal: str = Field(
         default="Provide a concise, source-grounded recommendation for insurance operations.",
         alias="EVAL_GOAL",
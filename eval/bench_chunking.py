@@ -0,0 +1,133 @@
+"""Benchmark the token-based chunker against the previous character splitter.
+
+Reports chunking throughput, chunk token-size statistics, and retrieval recall@k.
+Recall queries are random word spans sampled from the corpus; a query counts as
+recalled when one of the top-k retrieved chunks contains the span. With
+``--embedder openai`` real embeddings are used (needs OPENAI_API_KEY). The default
+``hashing`` embedder is a local bag-of-words model that only compares the two
+chunkers under the same conditions.
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import re
+import sys
+import time
+import zlib
+from pathlib import Path
+
+_root = Path(__file__).resolve().parent.parent
+if str(_root) not in sys.path:
+    sys.path.insert(0, str(_root))
+
+import numpy as np
+
+from config import PROJECT_ROOT, settings
+from retrieval.chunker import chunk_documents, get_encoding
+from retrieval.vector_store import get_embeddings, load_pdfs
+
+_WS = re.compile(r"\s+")
+
+
+def _norm(text: str) -> str:
+    return _WS.sub(" ", text).strip().lower()
+
+
+def character_chunks(documents) -> list[dict]:
+    """The splitter build_vector_store used before the token chunker."""
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+    splitter = RecursiveCharacterTextSplitter(chunk_size=800, chunk_overlap=150, length_function=len)
+    return [
+        {"source": d.metadata["source"], "page": d.metadata["page"], "text": d.page_content}
+        for d in splitter.split_documents(documents)
+    ]
+
+
+def token_chunks(documents) -> list[dict]:
+    return chunk_documents(
+        documents,
+        chunk_tokens=settings.chunk_tokens,
+        overlap_tokens=settings.chunk_overlap_tokens,
+    )
+
+
+def hashing_embed(texts: list[str], dim: int = 2048) -> np.ndarray:
+    """Sublinear-tf bag-of-words vectors hashed into dim buckets, L2-normalized."""
+    out = np.zeros((len(texts), dim), dtype="float32")
+    for row, text in enumerate(texts):
+        for word in _norm(text).split():
+            out[row, zlib.crc32(word.encode()) % dim] += 1.0
+    np.log1p(out, out=out)
+    out /= np.maximum(np.linalg.norm(out, axis=1, keepdims=True), 1e-12)
+    return out
+
+
+def embed(texts: list[str], embedder: str) -> np.ndarray:
+    if embedder == "openai":
+        vecs = np.asarray(get_embeddings(ingest=True).embed_documents(texts), dtype="float32")
+        return vecs / np.maximum(np.linalg.norm(vecs, axis=1, keepdims=True), 1e-12)
+    return hashing_embed(texts)
+
+
+def sample_queries(documents, n: int, words: int, seed: int) -> list[tuple[str, str]]:
+    """Return (source, span) pairs of `words` consecutive words from random pages."""
+    rng = random.Random(seed)
+    queries = []
+    while len(queries) < n:
+        doc = rng.choice(documents)
+        tokens = doc.page_content.split()
+        if len(tokens) < words * 2:
+            continue
+        start = rng.randrange(0, len(tokens) - words)
+        queries.append((doc.metadata["source"], " ".join(tokens[start : start + words])))
+    return queries
+
+
+def recall_at_k(chunks: list[dict], queries: list[tuple[str, str]], k: int, embedder: str) -> float:
+    chunk_vecs = embed([c["text"] for c in chunks], embedder)
+    query_vecs = embed([q for _, q in queries], embedder)
+    top = np.argsort(-(query_vecs @ chunk_vecs.T), axis=1)[:, :k]
+    normed = [_norm(c["text"]) for c in chunks]
+    hits = sum(
+        any(chunks[j]["source"] == source and _norm(span) in normed[j] for j in row)
+        for (source, span), row in zip(queries, top)
+    )
+    return hits / max(1, len(queries))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--docs-dir", type=Path, default=PROJECT_ROOT / "data" / "insurance_docs")
+    parser.add_argument("--embedder", choices=["hashing", "openai"], default="hashing")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--query-words", type=int, default=12)
+    parser.add_argument("-k", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    documents = load_pdfs(args.docs_dir)
+    print(f"Loaded {len(documents)} pages in {time.perf_counter() - t0:.1f}s")
+    if not documents:
+        sys.exit(1)
+    n_chars = sum(len(d.page_content) for d in documents)
+    queries = sample_queries(documents, args.queries, args.query_words, args.seed)
+    enc = get_encoding()
+
+    print(f"\n{'chunker':<12}{'pages/s':>10}{'MB/s':>8}{'chunks':>8}{'tok mean':>10}{'tok max':>9}{'recall@' + str(args.k):>11}")
+    for name, fn in (("character", character_chunks), ("token", token_chunks)):
+        start = time.perf_counter()
+        chunks = fn(documents)
+        elapsed = time.perf_counter() - start
+        sizes = np.array([len(t) for t in enc.encode_ordinary_batch([c["text"] for c in chunks])])
+        recall = recall_at_k(chunks, queries, args.k, args.embedder)
+        print(
+            f"{name:<12}{len(documents) / elapsed:>10.0f}{n_chars / elapsed / 1e6:>8.2f}{len(chunks):>8}"
+            f"{sizes.mean():>10.1f}{sizes.max():>9}{recall:>11.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
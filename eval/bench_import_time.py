@@ -0,0 +1,97 @@
+"""Profile cold import cost of the copilot entry points with ``python -X importtime``.
+
+Exits non-zero when a target exceeds the time budget or pulls in a heavy
+dependency that should only load on first use.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+_root = Path(__file__).resolve().parent.parent
+
+# Modules that must not be imported just by importing the targets; they load
+# lazily when the first request builds the graph, the index, or calls the API.
+HEAVY_MODULES = (
+    "langgraph",
+    "langchain_core",
+    "langchain_openai",
+    "langchain_text_splitters",
+    "openai",
+    "faiss",
+    "numpy",
+    "pypdf",
+    "pandas",
+)
+
+DEFAULT_TARGETS = ("agents.graph", "retrieval.vector_store")
+# Generous on purpose: about 270 ms of a cold import is config/pydantic_settings and
+# varies by machine. The list of modules loaded (HEAVY_MODULES) is the strict check.
+DEFAULT_BUDGET_MS = 1000.0
+
+
+def profile_import(module: str) -> list[tuple[str, int, int]]:
+    """Import module in a fresh interpreter and return (name, self_us, cumulative_us) rows."""
+    env = dict(os.environ, PYTHONPATH=str(_root))
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=str(_root),
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        try:
+            self_us, cumulative_us = int(parts[0]), int(parts[1])
+        except ValueError:
+            continue  # header row
+        rows.append((parts[2][1:].rstrip(), self_us, cumulative_us))  # keep nesting indent
+    return rows
+
+
+def summarize(rows: list[tuple[str, int, int]]) -> tuple[float, list[str]]:
+    """Total import time in ms and the HEAVY_MODULES loaded, for one profile_import() result."""
+    total_ms = sum(cum for name, _, cum in rows if not name.startswith(" ")) / 1000
+    loaded = {name.strip().split(".")[0] for name, _, _ in rows}
+    return total_ms, sorted(loaded.intersection(HEAVY_MODULES))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("modules", nargs="*", default=list(DEFAULT_TARGETS))
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per module; the best run is reported.")
+    parser.add_argument("--top", type=int, default=10, help="Slowest imports to list per module.")
+    args = parser.parse_args()
+
+    failures = []
+    for module in args.modules:
+        runs = [profile_import(module) for _ in range(max(1, args.repeat))]
+        rows = min(runs, key=lambda r: summarize(r)[0])
+        total_ms, heavy = summarize(rows)
+
+        print(f"{module}: {total_ms:.1f} ms (budget {args.budget_ms:.0f} ms)")
+        for name, _, cum in sorted(rows, key=lambda r: r[2], reverse=True)[: args.top]:
+            print(f"  {cum / 1000:8.1f} ms  {name.strip()}")
+        if total_ms > args.budget_ms:
+            failures.append(f"{module} took {total_ms:.1f} ms > {args.budget_ms:.0f} ms")
+        if heavy:
+            failures.append(f"{module} eagerly imports {', '.join(heavy)}")
+
+    if failures:
+        print("\nFAILED:\n" + "\n".join(f"- {f}" for f in failures))
+        sys.exit(1)
+    print("\nOK: all imports within budget and heavy dependencies load lazily.")
+
+
+if __name__ == "__main__":
+    main()
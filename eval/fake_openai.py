@@ -0,0 +1,167 @@
+"""Local fake OpenAI-compatible server for load tests: chat completions and embeddings.
+
+Serves ``POST /v1/chat/completions`` and ``POST /v1/embeddings`` with canned but
+well-formed answers for each agent (planner, researcher, writer, verifier) and
+deterministic bag-of-words embeddings. Every request sleeps for a latency drawn
+from a lognormal distribution fitted to the given median and p99, so the copilot
+sees realistic provider latency without network access or API cost.
+
+Point the app at it with OPENAI_BASE_URL=http://127.0.0.1:<port>/v1 and any
+non-empty OPENAI_API_KEY. eval/load_test.py starts it automatically.
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import math
+import random
+import re
+import sys
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+EMBEDDING_DIM = 256
+# z-score of the 99th percentile of a standard normal distribution.
+_Z99 = 2.326
+
+_CLAIM_ID = re.compile(r"^C(\d+):", re.MULTILINE)
+_WORD = re.compile(r"\w+")
+
+WRITER_DRAFT = {
+    "executive_summary": (
+        "Motor claims handling cost is rising across key markets. "
+        "Automating claims triage and fraud screening would reduce leakage and cycle time."
+    ),
+    "client_email": (
+        "Dear client,\nMotor claims handling cost is rising across your key markets. "
+        "We recommend automating triage and fraud screening first.\nBest regards,\nThe Advisory Team"
+    ),
+    "action_items": [
+        {"owner": "Claims Ops", "task": "Automate motor claims triage using existing claims data", "due_date": "Q1", "confidence": "high"},
+        {"owner": "Fraud Unit", "task": "Extend fraud screening rules to all new motor claims", "due_date": "Q2", "confidence": "medium"},
+    ],
+}
+
+
+class Latency:
+    """Lognormal latency in seconds with the given median and 99th percentile (milliseconds)."""
+
+    def __init__(self, median_ms: float, p99_ms: float):
+        self.mu = math.log(max(median_ms, 1e-3) / 1000)
+        self.sigma = max(math.log(max(p99_ms, median_ms) / max(median_ms, 1e-3)) / _Z99, 0.0)
+
+    def sample(self) -> float:
+        return random.lognormvariate(self.mu, self.sigma) if self.sigma else math.exp(self.mu)
+
+
+def embed(text: str | list[int]) -> list[float]:
+    """Hashed bag-of-words vector (token ids are hashed the same way), L2-normalized."""
+    words = [str(t) for t in text] if isinstance(text, list) else _WORD.findall(text.lower())
+    vec = [0.0] * EMBEDDING_DIM
+    for w in words:
+        vec[int(hashlib.md5(w.encode()).hexdigest()[:8], 16) % EMBEDDING_DIM] += 1.0
+    norm = math.sqrt(sum(v * v for v in vec)) or 1.0
+    return [v / norm for v in vec]
+
+
+def chat_reply(messages: list[dict]) -> str:
+    """Canned answer for whichever agent sent the request, keyed on its system prompt."""
+    system = next((m.get("content", "") for m in messages if m.get("role") == "system"), "")
+    user = next((m.get("content", "") for m in messages if m.get("role") == "user"), "")
+    if "strategic planner" in system:
+        return "1. Identify cost drivers in the sources.\n2. Compare markets.\n3. Recommend initiatives."
+    if "research analyst" in system:
+        return "Motor claims handling cost is rising across key markets; triage automation reduces cycle time."
+    if "business writer" in system:
+        return json.dumps(WRITER_DRAFT)
+    if "verifier" in system:
+        return json.dumps({f"C{n}": "S1" for n in _CLAIM_ID.findall(user)})
+    return "OK"
+
+
+def _usage(prompt: str, completion: str = "") -> dict[str, int]:
+    p, c = len(prompt) // 4, len(completion) // 4
+    return {"prompt_tokens": p, "completion_tokens": c, "total_tokens": p + c}
+
+
+def make_handler(chat_latency: Latency, embed_latency: Latency) -> type[BaseHTTPRequestHandler]:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format: str, *args) -> None:  # quiet
+            pass
+
+        def _send(self, status: int, body: dict) -> None:
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_POST(self) -> None:
+            length = int(self.headers.get("Content-Length") or 0)
+            request = json.loads(self.rfile.read(length) or b"{}")
+            if self.path.endswith("/chat/completions"):
+                time.sleep(chat_latency.sample())
+                messages = request.get("messages", [])
+                content = chat_reply(messages)
+                prompt = "".join(m.get("content", "") for m in messages)
+                self._send(200, {
+                    "id": f"chatcmpl-{random.getrandbits(48):x}",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": request.get("model", "fake"),
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+                    "usage": _usage(prompt, content),
+                })
+            elif self.path.endswith("/embeddings"):
+                time.sleep(embed_latency.sample())
+                inputs = request.get("input", [])
+                # A single string, a list of strings, a token-id list, or a list of token-id lists.
+                if isinstance(inputs, str) or (inputs and isinstance(inputs[0], int)):
+                    inputs = [inputs]
+                self._send(200, {
+                    "object": "list",
+                    "model": request.get("model", "fake"),
+                    "data": [{"object": "embedding", "index": i, "embedding": embed(t)} for i, t in enumerate(inputs)],
+                    "usage": {"prompt_tokens": 0, "total_tokens": 0},
+                })
+            else:
+                self._send(404, {"error": {"message": f"Unknown path {self.path}", "type": "invalid_request_error"}})
+
+    return Handler
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=0, help="0 picks a free port.")
+    parser.add_argument("--chat-median-ms", type=float, default=1200.0)
+    parser.add_argument("--chat-p99-ms", type=float, default=4000.0)
+    parser.add_argument("--embed-median-ms", type=float, default=80.0)
+    parser.add_argument("--embed-p99-ms", type=float, default=300.0)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    handler = make_handler(
+        Latency(args.chat_median_ms, args.chat_p99_ms),
+        Latency(args.embed_median_ms, args.embed_p99_ms),
+    )
+    server = ThreadingHTTPServer((args.host, args.port), handler)
+    server.daemon_threads = True
+    # The first line tells a parent process where to connect.
+    print(f"http://{args.host}:{server.server_address[1]}/v1", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
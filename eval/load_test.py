@@ -0,0 +1,342 @@
+"""Load test run_copilot with concurrent sessions and print a capacity report.
+
+Replays eval/test_prompts.txt and the app's READY_QUESTIONS against the full
+workflow in this process. ``--mode closed`` keeps N sessions busy back to back
+for each concurrency level. ``--mode open`` starts sessions on a Poisson
+schedule at each arrival rate (sessions/s) regardless of how many are still
+running, and measures latency from the scheduled start, so queueing counts.
+
+By default the OpenAI API is replaced by eval/fake_openai.py, started as a
+separate process with lognormal chat/embedding latency. The index, trace store
+and checkpoints go to --workdir so the real ones are untouched.
+
+For each level the report gives throughput, p50/p90/p99 latency, errors, CPU
+time per session, and RSS growth per in-flight session. The saturation point is
+the first level that stops scaling: in closed loop, throughput grows by less
+than --min-gain over the previous level; in open loop, achieved throughput falls
+below 95% of the offered rate. In both modes a level also saturates when it
+exceeds --slo-p99-ms or --max-error-rate.
+"""
+from __future__ import annotations
+
+import argparse
+import ast
+import itertools
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable
+
+_root = Path(__file__).resolve().parent.parent
+if str(_root) not in sys.path:
+    sys.path.insert(0, str(_root))
+
+DEFAULT_WORKDIR = _root / "data" / "loadtest"
+
+
+def load_prompts() -> list[tuple[str, str]]:
+    """(question, goal) pairs from test_prompts.txt plus READY_QUESTIONS (goal "" = EVAL_GOAL)."""
+    prompts = []
+    for line in (Path(__file__).parent / "test_prompts.txt").read_text(encoding="utf-8").splitlines():
+        line = line.strip()
+        if line and not line.startswith("#"):
+            question, _, goal = line.partition("||")
+            prompts.append((question.strip(), goal.strip()))
+    # Read from the source so the harness does not need streamlit installed.
+    tree = ast.parse((_root / "app" / "main.py").read_text(encoding="utf-8"))
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(getattr(t, "id", "") == "READY_QUESTIONS" for t in node.targets):
+            prompts.extend((q, "") for q in ast.literal_eval(node.value))
+    return prompts
+
+
+def start_fake_server(args: argparse.Namespace) -> tuple[subprocess.Popen, str]:
+    """Start eval/fake_openai.py on a free port; return the process and its base URL."""
+    proc = subprocess.Popen(
+        [
+            sys.executable,
+            str(Path(__file__).parent / "fake_openai.py"),
+            "--chat-median-ms", str(args.chat_median_ms),
+            "--chat-p99-ms", str(args.chat_p99_ms),
+            "--embed-median-ms", str(args.embed_median_ms),
+            "--embed-p99-ms", str(args.embed_p99_ms),
+        ]
+        + (["--seed", str(args.seed)] if args.seed is not None else []),
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    base_url = proc.stdout.readline().strip()
+    if not base_url:
+        proc.kill()
+        raise RuntimeError("fake_openai.py did not start")
+    return proc, base_url
+
+
+def rss_bytes() -> int:
+    """Current resident set size of this process (peak RSS where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+class Sampler(threading.Thread):
+    """Tracks peak RSS and peak in-flight sessions while a level runs."""
+
+    def __init__(self, interval: float = 0.1):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.peak_rss = rss_bytes()
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+
+    def enter(self) -> None:
+        with self._lock:
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    def exit(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+
+    def run(self) -> None:
+        while not self._done.wait(self.interval):
+            self.peak_rss = max(self.peak_rss, rss_bytes())
+
+    def stop(self) -> None:
+        self._done.set()
+        self.join()
+        self.peak_rss = max(self.peak_rss, rss_bytes())
+
+
+def make_session(prompts: list[tuple[str, str]], seed: int | None) -> Callable[[], dict[str, Any]]:
+    """A thread-safe callable that runs the next prompt and returns its outcome."""
+    from agents.graph import run_copilot
+    from config import settings
+
+    order = list(prompts)
+    random.Random(seed).shuffle(order)
+    cycle = itertools.cycle(order)
+    lock = threading.Lock()
+
+    def session() -> dict[str, Any]:
+        with lock:
+            question, goal = next(cycle)
+        try:
+            out = run_copilot(question, goal or settings.eval_goal, output_mode=settings.eval_output_mode)
+        except Exception as e:
+            return {"ok": False, "error": f"{type(e).__name__}: {e}"}
+        # Nodes catch non-transient failures and report them in their metrics; a run
+        # without an index version answered without retrieval (e.g. the build failed).
+        node_errors = out.get("observability", {}).get("totals", {}).get("errors", 0)
+        if not out.get("index_version"):
+            return {"ok": False, "error": "no index version (retrieval unavailable)"}
+        return {"ok": not node_errors, "error": f"{node_errors} node error(s)" if node_errors else ""}
+
+    return session
+
+
+def run_level(mode: str, level: float, duration: float, session: Callable[[], dict[str, Any]], seed: int | None) -> dict[str, Any]:
+    """Run one concurrency level (closed) or arrival rate (open) for duration seconds."""
+    from eval.trace_report import percentile
+
+    latencies: list[float] = []
+    errors: list[str] = []
+    lock = threading.Lock()
+    sampler = Sampler()
+    rss_before = rss_bytes()
+    cpu_before = time.process_time()
+    start = time.perf_counter()
+    deadline = start + duration
+    sampler.start()
+
+    def timed(scheduled: float) -> None:
+        sampler.enter()
+        try:
+            outcome = session()
+        finally:
+            sampler.exit()
+        with lock:
+            latencies.append(time.perf_counter() - scheduled)
+            if not outcome["ok"]:
+                errors.append(outcome["error"])
+
+    if mode == "closed":
+        def worker() -> None:
+            while time.perf_counter() < deadline:
+                timed(time.perf_counter())
+
+        workers = [threading.Thread(target=worker, daemon=True) for _ in range(int(level))]
+        for w in workers:
+            w.start()
+        for w in workers:
+            w.join()
+    else:
+        rng = random.Random(seed)
+        # Unbounded in practice: an open-loop generator must not wait for sessions to finish.
+        with ThreadPoolExecutor(max_workers=max(32, int(level * duration))) as pool:
+            scheduled = start
+            while True:
+                scheduled += rng.expovariate(level)
+                if scheduled >= deadline:
+                    break
+                time.sleep(max(0.0, scheduled - time.perf_counter()))
+                pool.submit(timed, scheduled)
+
+    elapsed = time.perf_counter() - start
+    cpu = time.process_time() - cpu_before
+    sampler.stop()
+    completed = len(latencies)
+    lat_ms = [x * 1000 for x in latencies]
+    return {
+        "level": level,
+        "completed": completed,
+        "errors": len(errors),
+        "error_rate": len(errors) / completed if completed else 0.0,
+        "error_samples": sorted(set(errors))[:3],
+        "throughput_per_s": completed / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(lat_ms, 50),
+        "p90_ms": percentile(lat_ms, 90),
+        "p99_ms": percentile(lat_ms, 99),
+        "cpu_ms_per_session": 1000 * cpu / completed if completed else 0.0,
+        "cpu_utilization": cpu / elapsed if elapsed else 0.0,
+        "peak_in_flight": sampler.peak_in_flight,
+        "rss_mb": sampler.peak_rss / 2**20,
+        "rss_mb_per_session": max(0, sampler.peak_rss - rss_before) / 2**20 / max(sampler.peak_in_flight, 1),
+    }
+
+
+def find_saturation(mode: str, rows: list[dict[str, Any]], min_gain: float, slo_p99_ms: float, max_error_rate: float) -> dict[str, Any] | None:
+    """Mark each row's "saturated" flag and return the first saturated row (None if all scaled)."""
+    first = None
+    for prev, row in zip([None] + rows[:-1], rows):
+        reasons = []
+        if mode == "closed" and prev is not None and row["throughput_per_s"] < prev["throughput_per_s"] * (1 + min_gain):
+            reasons.append(f"throughput gain < {min_gain:.0%}")
+        if mode == "open" and row["throughput_per_s"] < 0.95 * row["level"]:
+            reasons.append("throughput < 95% of offered rate")
+        if slo_p99_ms and row["p99_ms"] > slo_p99_ms:
+            reasons.append(f"p99 > {slo_p99_ms:.0f} ms")
+        if row["error_rate"] > max_error_rate:
+            reasons.append(f"error rate > {max_error_rate:.0%}")
+        row["saturated"] = ", ".join(reasons)
+        if reasons and first is None:
+            first = row
+    return first
+
+
+def print_report(mode: str, rows: list[dict[str, Any]], saturation: dict[str, Any] | None) -> None:
+    unit = "sessions" if mode == "closed" else "arr/s"
+    print(
+        f"{unit:>9}{'done':>7}{'err':>5}{'thr/s':>8}{'p50 ms':>9}{'p99 ms':>9}"
+        f"{'cpu ms/sess':>12}{'cpu %':>7}{'in-flt':>7}{'rss MB':>8}{'MB/sess':>8}  saturated"
+    )
+    for r in rows:
+        print(
+            f"{r['level']:>9g}{r['completed']:>7}{r['errors']:>5}{r['throughput_per_s']:>8.2f}"
+            f"{r['p50_ms']:>9.0f}{r['p99_ms']:>9.0f}{r['cpu_ms_per_session']:>12.0f}"
+            f"{100 * r['cpu_utilization']:>7.0f}{r['peak_in_flight']:>7}{r['rss_mb']:>8.0f}"
+            f"{r['rss_mb_per_session']:>8.1f}  {r['saturated']}"
+        )
+    if saturation is None:
+        print("\nNo saturation within the tested levels; try higher levels.")
+        return
+    idx = rows.index(saturation)
+    best = max(rows[: idx + 1], key=lambda r: r["throughput_per_s"])
+    capacity = f"{rows[idx - 1]['level']:g} {unit}" if idx else "below the first level"
+    print(
+        f"\nSaturation at {saturation['level']:g} {unit} ({saturation['saturated']}). "
+        f"Capacity: {capacity}; peak throughput {best['throughput_per_s']:.2f} sessions/s."
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=("closed", "open"), default="closed")
+    parser.add_argument(
+        "--levels",
+        default=None,
+        help="Comma-separated concurrency levels (closed, default 1,2,4,8,16) or arrival rates/s (open, default 0.5,1,2,4,8).",
+    )
+    parser.add_argument("--duration", type=float, default=60.0, help="Seconds per level.")
+    parser.add_argument("--warmup", type=int, default=2, help="Sessions run before measuring (index build, graph compile).")
+    parser.add_argument("--min-gain", type=float, default=0.10, help="Closed loop: minimum throughput gain per level.")
+    parser.add_argument("--slo-p99-ms", type=float, default=0.0, help="p99 latency SLO; 0 disables.")
+    parser.add_argument("--max-error-rate", type=float, default=0.01)
+    parser.add_argument("--base-url", default="", help="Use this OpenAI-compatible endpoint instead of starting the fake server.")
+    parser.add_argument("--chat-median-ms", type=float, default=1200.0)
+    parser.add_argument("--chat-p99-ms", type=float, default=4000.0)
+    parser.add_argument("--embed-median-ms", type=float, default=80.0)
+    parser.add_argument("--embed-p99-ms", type=float, default=300.0)
+    parser.add_argument("--workdir", type=Path, default=DEFAULT_WORKDIR, help="Index, trace and checkpoint files for the test.")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--out", type=Path, default=Path(__file__).parent / "load_report.json")
+    args = parser.parse_args()
+    default_levels = "1,2,4,8,16" if args.mode == "closed" else "0.5,1,2,4,8"
+    levels = [float(x) for x in (args.levels or default_levels).split(",")]
+
+    server = None
+    if args.base_url:
+        base_url = args.base_url
+    else:
+        server, base_url = start_fake_server(args)
+        os.environ["OPENAI_API_KEY"] = "sk-fake-load-test"
+    args.workdir.mkdir(parents=True, exist_ok=True)
+    # Must be set before config is imported: settings are read once at import.
+    os.environ.update(
+        OPENAI_BASE_URL=base_url,
+        INDEX_DIR=str(args.workdir / "index"),
+        TRACE_DB=str(args.workdir / "traces.db"),
+        CHECKPOINT_DB=str(args.workdir / "checkpoints.db"),
+        INDEX_WATCH_INTERVAL="0",
+    )
+    try:
+        prompts = load_prompts()
+        session = make_session(prompts, args.seed)
+        print(f"Endpoint {base_url}; {len(prompts)} prompts; warming up...")
+        for _ in range(args.warmup):
+            outcome = session()
+            if not outcome["ok"]:
+                print(f"Warm-up session failed: {outcome['error']}")
+                sys.exit(1)
+        rows = []
+        for level in levels:
+            print(f"Running {args.mode} loop at {level:g} for {args.duration:.0f}s...")
+            rows.append(run_level(args.mode, level, args.duration, session, args.seed))
+        saturation = find_saturation(args.mode, rows, args.min_gain, args.slo_p99_ms, args.max_error_rate)
+        print()
+        print_report(args.mode, rows, saturation)
+        report = {
+            "mode": args.mode,
+            "duration_s": args.duration,
+            "endpoint": "fake" if server else base_url,
+            "fake_latency_ms": None if args.base_url else {
+                "chat_median": args.chat_median_ms,
+                "chat_p99": args.chat_p99_ms,
+                "embed_median": args.embed_median_ms,
+                "embed_p99": args.embed_p99_ms,
+            },
+            "levels": rows,
+            "saturation_level": saturation["level"] if saturation else None,
+        }
+        args.out.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"Wrote {args.out}")
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
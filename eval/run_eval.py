@@ -1,6 +1,11 @@
-"""Run evaluation over test prompts using MODEL_EVAL and write eval_results.json."""
+"""Run evaluation over test prompts using MODEL_EVAL and write eval_results.json.
+
+With --resume, prompts that failed in the previous eval_results.json are resumed
+from their checkpoints instead of being run again from the start.
+"""
 from __future__ import annotations
 
+import argparse
 import json
 import sys
 from pathlib import Path
@@ -11,10 +16,62 @@ if str(_root) not in sys.path:
     sys.path.insert(0, str(_root))
 
 from config import settings
-from agents.graph import run_copilot
+from agents.graph import new_run_id, resume_copilot, run_copilot
+
+
+def _result(question: str, goal: str, run_id: str, out: dict) -> dict:
+    return {
+        "question": question,
+        "goal": goal,
+        "run_id": run_id,
+        "verified_output": out.get("verified_output", {}),
+        "observability": out.get("observability", {}),
+        "index_version": out.get("index_version", ""),
+        "corpus": out.get("corpus", ""),
+    }
+
+
+def _error(question: str, goal: str, run_id: str, e: Exception) -> dict:
+    return {
+        "question": question,
+        "goal": goal,
+        "run_id": run_id,
+        "error": str(e),
+        "verified_output": {},
+        "observability": {},
+    }
+
+
+def resume_failed(out_path: Path) -> None:
+    """Resume every errored entry of an existing results file from its checkpoint."""
+    results = json.loads(out_path.read_text(encoding="utf-8"))
+    failed = [i for i, r in enumerate(results) if r.get("error") and r.get("run_id")]
+    for n, i in enumerate(failed):
+        r = results[i]
+        print(f"Resuming {n + 1}/{len(failed)}: {r['question'][:50]}...")
+        try:
+            results[i] = _result(r["question"], r["goal"], r["run_id"], resume_copilot(r["run_id"]))
+        except KeyError:
+            print(f"  no checkpoint for run {r['run_id']}; rerun without --resume")
+        except Exception as e:
+            results[i] = _error(r["question"], r["goal"], r["run_id"], e)
+    out_path.write_text(json.dumps(results, indent=2), encoding="utf-8")
+    print(f"Wrote {out_path}")
 
 
 def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--resume", action="store_true", help="Resume failed runs from the last eval_results.json.")
+    parser.add_argument("--corpus", default=None, help="Corpus to answer from (default: CORPUS).")
+    args = parser.parse_args()
+    out_path = Path(__file__).parent / "eval_results.json"
+    if args.resume:
+        if not out_path.exists():
+            print(f"Missing {out_path}")
+            sys.exit(1)
+        resume_failed(out_path)
+        return
+
     prompts_path = Path(__file__).parent / "test_prompts.txt"
     if not prompts_path.exists():
         print(f"Missing {prompts_path}")
@@ -29,30 +86,20 @@ def main() -> None:
         question = parts[0].strip()
         goal = parts[1].strip() if len(parts) > 1 else settings.eval_goal
         print(f"Running {i + 1}/{len(lines)}: {question[:50]}...")
+        run_id = new_run_id()
         try:
             out = run_copilot(
                 question=question,
                 goal=goal,
                 output_mode=settings.eval_output_mode,
+                run_id=run_id,
+                corpus=args.corpus,
             )
-            results.append({
-                "question": question,
-                "goal": goal,
-                "verified_output": out.get("verified_output", {}),
-                "observability": out.get("observability", {}),
-            })
+            results.append(_result(question, goal, run_id, out))
         except Exception as e:
-            results.append({
-                "question": question,
-                "goal": goal,
-                "error": str(e),
-                "verified_output": {},
-                "observability": {},
-            })
-    out_path = Path(__file__).parent / "eval_results.json"
+            results.append(_error(question, goal, run_id, e))
     out_path.write_text(json.dumps(results, indent=2), encoding="utf-8")
     print(f"Wrote {out_path}")
 
-
 if __name__ == "__main__":
     main()
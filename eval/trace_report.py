@@ -0,0 +1,58 @@
+"""Summarize historical per-agent and per-run latency from the trace store."""
+from __future__ import annotations
+
+import argparse
+import math
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+_root = Path(__file__).resolve().parent.parent
+if str(_root) not in sys.path:
+    sys.path.insert(0, str(_root))
+
+from agents.trace_store import get_trace_store
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Nearest-rank percentile (q in 0..100) of values."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    # The smallest value with at least q% of the values at or below it; rounding drops
+    # float noise that would push an exact rank up by one (0.07 * 100 is 7.000000000000001).
+    rank = max(0, min(len(ordered) - 1, math.ceil(round(q * len(ordered) / 100, 9)) - 1))
+    return ordered[rank]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--days", type=float, default=7.0, help="Look back this many days.")
+    parser.add_argument("--agent", default=None, help="Only this agent (planner, researcher, writer, verifier).")
+    args = parser.parse_args()
+
+    events = get_trace_store().events(since=time.time() - args.days * 86400, agent=args.agent)
+    if not events:
+        print("No trace events in range.")
+        return
+    by_agent: dict[str, list[dict]] = defaultdict(list)
+    by_run: dict[str, int] = defaultdict(int)
+    for e in events:
+        by_agent[e["agent"]].append(e)
+        by_run[e["run_id"]] += e["latency_ms"]
+
+    print(f"{'agent':<12}{'count':>7}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}{'tokens':>9}{'err %':>7}")
+    rows = list(by_agent.items()) + [("run total", [{"latency_ms": v, "total_tokens": 0, "errors": 0} for v in by_run.values()])]
+    for agent, rows_ in rows:
+        lat = [r["latency_ms"] for r in rows_]
+        tokens = sum(r["total_tokens"] for r in rows_) / len(rows_)
+        err = 100 * sum(1 for r in rows_ if r["errors"]) / len(rows_)
+        print(
+            f"{agent:<12}{len(rows_):>7}{percentile(lat, 50):>9.0f}{percentile(lat, 95):>9.0f}"
+            f"{percentile(lat, 99):>9.0f}{max(lat):>9.0f}{tokens:>9.0f}{err:>7.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
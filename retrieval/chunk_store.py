@@ -0,0 +1,129 @@
+"""Compact chunk store: chunk text in one memory-mapped UTF-8 blob, metadata in NumPy arrays.
+
+A store is a directory with four files:
+
+- ``text.bin``   — every chunk's text, UTF-8 encoded and concatenated
+- ``chunks.npy`` — one ``CHUNK_DTYPE`` record per chunk (source id, page, byte span, char offset,
+  token count, section id, guard flags)
+- ``sources.json`` — source document names, indexed by ``source_id``
+- ``sections.json`` — section headings, indexed by ``section_id``
+
+Both data files are opened read-only with ``mmap``, so the store costs almost no
+Python heap and several worker processes reading the same directory share one
+copy through the OS page cache.
+"""
+from __future__ import annotations
+
+import json
+import mmap
+from pathlib import Path
+from typing import Any, Iterable
+
+import numpy as np
+
+TEXT_FILE = "text.bin"
+META_FILE = "chunks.npy"
+SOURCES_FILE = "sources.json"
+SECTIONS_FILE = "sections.json"
+
+CHUNK_DTYPE = np.dtype(
+    [
+        ("source_id", "<u4"),
+        ("page", "<u4"),
+        ("start", "<u8"),  # byte offset of the chunk in text.bin
+        ("length", "<u4"),  # byte length of the chunk in text.bin
+        ("char_offset", "<u4"),  # character offset of the chunk within its page
+        ("n_tokens", "<u4"),  # precomputed token count of the chunk text
+        ("section_id", "<u4"),  # index into sections.json ("" when the chunk has no heading)
+        ("flags", "u1"),  # FLAG_* bits set at ingest
+    ]
+)
+
+# Chunk flagged by the prompt-injection guard (agents.guard); it has no vector in the index.
+FLAG_INJECTION = 1
+
+
+def write_chunk_store(path: Path, chunks: Iterable[dict[str, Any]]) -> int:
+    """
+    Write chunks to a store directory and return the number of chunks written.
+
+    Each chunk is a dict with keys: source, page, char_offset, text, and optionally
+    n_tokens, section and flags.
+    """
+    path.mkdir(parents=True, exist_ok=True)
+    source_ids: dict[str, int] = {}
+    section_ids: dict[str, int] = {"": 0}
+    records = []
+    offset = 0
+    with open(path / TEXT_FILE, "wb") as blob:
+        for chunk in chunks:
+            data = chunk["text"].encode("utf-8")
+            source_id = source_ids.setdefault(chunk["source"], len(source_ids))
+            section_id = section_ids.setdefault(chunk.get("section") or "", len(section_ids))
+            records.append(
+                (
+                    source_id,
+                    int(chunk.get("page", 0)),
+                    offset,
+                    len(data),
+                    int(chunk.get("char_offset", 0)),
+                    int(chunk.get("n_tokens", 0)),
+                    section_id,
+                    int(chunk.get("flags", 0)),
+                )
+            )
+            blob.write(data)
+            offset += len(data)
+    np.save(path / META_FILE, np.array(records, dtype=CHUNK_DTYPE))
+    (path / SOURCES_FILE).write_text(json.dumps(list(source_ids)), encoding="utf-8")
+    (path / SECTIONS_FILE).write_text(json.dumps(list(section_ids)), encoding="utf-8")
+    return len(records)
+
+
+class ChunkStore:
+    """Read-only, memory-mapped view over a chunk store directory."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.meta = np.load(self.path / META_FILE, mmap_mode="r")
+        self.sources: list[str] = json.loads((self.path / SOURCES_FILE).read_text(encoding="utf-8"))
+        self.sections: list[str] = json.loads((self.path / SECTIONS_FILE).read_text(encoding="utf-8"))
+        with open(self.path / TEXT_FILE, "rb") as f:
+            # mmap cannot map an empty file; an empty store simply has no text.
+            if (self.path / TEXT_FILE).stat().st_size:
+                self._blob = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+            else:
+                self._blob = memoryview(b"")
+
+    def __len__(self) -> int:
+        return len(self.meta)
+
+    def view(self, i: int) -> memoryview:
+        """Return chunk i's UTF-8 bytes as a zero-copy slice of the mapped blob."""
+        rec = self.meta[i]
+        start = int(rec["start"])
+        return self._blob[start : start + int(rec["length"])]
+
+    def text(self, i: int, max_chars: int | None = None) -> str:
+        """Decode chunk i, or only its first max_chars characters."""
+        data = self.view(i)
+        if max_chars is not None:
+            # A UTF-8 character is at most 4 bytes, so this prefix covers max_chars.
+            data = data[: max_chars * 4]
+            return str(data, "utf-8", errors="ignore")[:max_chars]
+        return str(data, "utf-8")
+
+    def source(self, i: int) -> str:
+        return self.sources[int(self.meta["source_id"][i])]
+
+    def page(self, i: int) -> int:
+        return int(self.meta["page"][i])
+
+    def char_offset(self, i: int) -> int:
+        return int(self.meta["char_offset"][i])
+
+    def n_tokens(self, i: int) -> int:
+        return int(self.meta["n_tokens"][i])
+
+    def section(self, i: int) -> str:
+        return self.sections[int(self.meta["section_id"][i])]
@@ -0,0 +1,177 @@
+"""Token-based, page- and layout-aware chunking of PDF pages.
+
+Pages of one document are treated as a stream of lines. Lines are packed into
+chunks of up to ``chunk_tokens`` tokens. A chunk is closed early at a section
+heading or at a page break, unless it is still shorter than ``min_tokens``, in
+which case the next page is merged in. Every chunk records its token count,
+the section heading it falls under, and the page and character offset where
+it starts, which together give a stable citation anchor.
+
+Token counts use the chat model's tokenizer (MODEL_MAIN), since chunk budgets and
+``n_tokens`` are prompt-side sizes. A chunk never exceeds ``chunk_tokens``: the
+overlap carried into the next chunk is trimmed to leave room for the line that
+follows it.
+"""
+from __future__ import annotations
+
+import re
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Iterable
+
+from config import settings
+
+if TYPE_CHECKING:
+    from langchain_core.documents import Document
+
+# Tokenizer of the gpt-4o / gpt-4.1 family, used for chat models tiktoken does not know.
+FALLBACK_ENCODING = "o200k_base"
+
+_NUMBERED_HEADING = re.compile(r"^(\d+(\.\d+)*|[IVXLC]+\.|[A-Z]\.)\s+[A-Z]")
+
+
+def encoding_name() -> str:
+    """Name of MODEL_MAIN's tiktoken encoding (no encoding file is loaded)."""
+    from tiktoken.model import encoding_name_for_model
+
+    try:
+        return encoding_name_for_model(settings.model_main)
+    except KeyError:
+        return FALLBACK_ENCODING
+
+
+@lru_cache(maxsize=1)
+def get_encoding():
+    import tiktoken
+
+    return tiktoken.get_encoding(encoding_name())
+
+
+def count_tokens(text: str) -> int:
+    return len(get_encoding().encode_ordinary(text))
+
+
+def is_heading(line: str) -> bool:
+    """Heuristic for a section heading in extracted PDF text: short, unpunctuated, upper-case or numbered."""
+    line = line.strip()
+    words = line.split()
+    if not 1 <= len(words) <= 12 or len(line) > 80 or line[-1] in ".,;:!?":
+        return False
+    if not any(c.isalpha() for c in line):
+        return False
+    if line.isupper() and len(line) > 3:
+        return True
+    return bool(_NUMBERED_HEADING.match(line)) and len(words) >= 2
+
+
+def _split_long_line(line: str, offset: int, max_tokens: int) -> list[tuple[str, int, int]]:
+    """Split a line longer than max_tokens into token windows of (text, char_offset, n_tokens)."""
+    enc = get_encoding()
+    tokens = enc.encode_ordinary(line)
+    pieces = []
+    for i in range(0, len(tokens), max_tokens):
+        text = enc.decode(tokens[i : i + max_tokens])
+        pieces.append((text, offset, len(tokens[i : i + max_tokens])))
+        offset += len(text)
+    return pieces
+
+
+def chunk_pages(
+    pages: Iterable[dict[str, Any]],
+    chunk_tokens: int = 200,
+    overlap_tokens: int = 40,
+    min_tokens: int | None = None,
+) -> list[dict[str, Any]]:
+    """
+    Chunk pages (dicts with source, page, text) in reading order.
+
+    Returns chunk dicts with keys: source, page, char_offset, text, n_tokens, section.
+    page/char_offset locate the chunk's first line in the original page text.
+    """
+    if min_tokens is None:
+        min_tokens = chunk_tokens // 2
+    enc = get_encoding()
+    chunks: list[dict[str, Any]] = []
+    # Current chunk: list of (text, page, char_offset, n_tokens, section) lines. A chunk is
+    # labelled with its first line's section, so a heading merged into a short chunk
+    # does not relabel the text before it. buf_tokens counts one token per "\n" joining lines.
+    buf: list[tuple[str, int, int, int, str]] = []
+    buf_tokens = 0
+    source = None
+    section = ""
+
+    def flush(keep_overlap: bool, incoming: int = 0) -> None:
+        nonlocal buf, buf_tokens
+        if buf:
+            chunks.append(
+                {
+                    "source": source,
+                    "page": buf[0][1],
+                    "char_offset": buf[0][2],
+                    "text": "\n".join(line[0] for line in buf),
+                    "section": buf[0][4],
+                }
+            )
+        carry: list[tuple[str, int, int, int, str]] = []
+        carry_tokens = 0
+        if keep_overlap:
+            # The carried lines plus the incoming line (and its "\n") must fit in one chunk.
+            budget = min(overlap_tokens, chunk_tokens - incoming - 1)
+            for line in reversed(buf[1:]):
+                cost = line[3] + (1 if carry else 0)
+                if carry_tokens + cost > budget:
+                    break
+                carry.insert(0, line)
+                carry_tokens += cost
+        buf, buf_tokens = carry, carry_tokens
+
+    for page in pages:
+        if page["source"] != source:
+            flush(keep_overlap=False)
+            source, section = page["source"], ""
+        elif buf_tokens >= min_tokens:
+            flush(keep_overlap=False)
+
+        lines = []
+        offset = 0
+        for raw in page["text"].split("\n"):
+            if raw.strip():
+                lines.append((raw, offset))
+            offset += len(raw) + 1
+        counts = enc.encode_ordinary_batch([raw for raw, _ in lines]) if lines else []
+
+        for (raw, offset), tokens in zip(lines, counts):
+            if is_heading(raw):
+                if buf_tokens >= min_tokens:
+                    flush(keep_overlap=False)
+                section = raw.strip()
+            pieces = (
+                _split_long_line(raw, offset, chunk_tokens)
+                if len(tokens) > chunk_tokens
+                else [(raw, offset, len(tokens))]
+            )
+            for text, char_offset, n in pieces:
+                if buf and buf_tokens + 1 + n > chunk_tokens:
+                    flush(keep_overlap=True, incoming=n)
+                buf_tokens += n + (1 if buf else 0)
+                buf.append((text, page["page"], char_offset, n, section))
+    flush(keep_overlap=False)
+
+    # Exact counts for the joined text, so prompt packing never has to re-tokenize.
+    for chunk, tokens in zip(chunks, enc.encode_ordinary_batch([c["text"] for c in chunks])):
+        chunk["n_tokens"] = len(tokens)
+    return chunks
+
+
+def chunk_documents(documents: list[Document], **kwargs: Any) -> list[dict[str, Any]]:
+    """Chunk LangChain page Documents from load_pdfs(); see chunk_pages for options."""
+    return chunk_pages(
+        (
+            {
+                "source": d.metadata.get("source", "Unknown"),
+                "page": d.metadata.get("page", 0),
+                "text": d.page_content,
+            }
+            for d in documents
+        ),
+        **kwargs,
+    )
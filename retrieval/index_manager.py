@@ -0,0 +1,322 @@
+"""Background index loading, re-indexing, atomic hot-swap of index versions, and the per-corpus registry."""
+from __future__ import annotations
+
+import logging
+import re
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Optional
+
+from config import settings
+
+from .vector_store import (
+    CURRENT_FILE,
+    DEFAULT_DOCS_DIR,
+    MANIFEST_FILE,
+    VectorIndex,
+    corpus_fingerprint,
+    current_version,
+    open_index,
+    publish_index,
+)
+
+logger = logging.getLogger(__name__)
+
+# The corpus served from data/insurance_docs; every other corpus is a folder in CORPORA_DIR.
+DEFAULT_CORPUS = "default"
+_CORPUS_NAME = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_.-]*$")
+
+
+class IndexManager:
+    """
+    Owns the live VectorIndex for one document folder.
+
+    A background thread opens the last published version (cheap: files are
+    memory-mapped), then re-indexes if the PDFs changed since, and afterwards polls
+    the folder every ``watch_interval`` seconds (0 disables polling; ``reload()``
+    triggers a check explicitly). A new version is built to the side and swapped in
+    with a single reference assignment. Readers take ``current()`` once per request
+    and keep that immutable version for the whole request, so a re-ingest never
+    blocks or changes a live session.
+    """
+
+    def __init__(
+        self,
+        docs_dir: Path | None = None,
+        index_dir: Path | None = None,
+        watch_interval: float | None = None,
+    ):
+        self.docs_dir = Path(docs_dir or DEFAULT_DOCS_DIR)
+        self.index_dir = Path(index_dir or settings.index_dir / DEFAULT_CORPUS)
+        self.watch_interval = settings.index_watch_interval if watch_interval is None else watch_interval
+        self.last_error: str = ""
+        self._current: Optional[VectorIndex] = None
+        self._ready = threading.Event()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._refreshed = threading.Condition()
+        self._refresh_count = 0
+        self._refreshing = False
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    @property
+    def version(self) -> str:
+        """Version of the index currently being served ("" before the first load)."""
+        current = self._current
+        return current.version if current is not None else ""
+
+    @property
+    def ready(self) -> bool:
+        """True once the first load has finished, whether or not it produced an index."""
+        return self._ready.is_set()
+
+    @property
+    def nbytes(self) -> int:
+        """Mapped size of the index currently being served (0 before the first load)."""
+        current = self._current
+        return current.nbytes if current is not None else 0
+
+    def start(self) -> IndexManager:
+        """Start the background loader/watcher once; safe to call on every app rerun."""
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="index-manager", daemon=True)
+                self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._wake.set()
+
+    def current(self, timeout: float | None = None) -> Optional[VectorIndex]:
+        """Return the live index, waiting (up to timeout) only if none has been loaded yet."""
+        if self._current is None:
+            self.start()
+            self._ready.wait(timeout)
+        return self._current
+
+    def get(self, version: str) -> Optional[VectorIndex]:
+        """The index for a specific version: the live one, or an older one still on disk (None if pruned)."""
+        current = self.current()
+        if current is None or not version or current.version == version:
+            return current
+        return open_index(self.index_dir, version)
+
+    def reload(self, wait: bool = False, timeout: float | None = None) -> str:
+        """Ask the background thread to re-check the PDFs; optionally wait for the check to finish."""
+        self.start()
+        with self._refreshed:
+            # A check already in progress may have missed the change; wait for the next one.
+            target = self._refresh_count + (2 if self._refreshing else 1)
+            self._wake.set()
+            if wait:
+                self._refreshed.wait_for(lambda: self._refresh_count >= target, timeout)
+        return self.version
+
+    def _swap(self, index: VectorIndex) -> None:
+        previous = self.version
+        self._current = index
+        if previous != index.version:
+            logger.info("Serving index version %s (was %s)", index.version, previous or "none")
+
+    def _refresh(self) -> None:
+        with self._refreshed:
+            self._refreshing = True
+        try:
+            if not self.docs_dir.exists():
+                return
+            fingerprint = corpus_fingerprint(self.docs_dir)
+            current = self._current
+            if current is not None and current.fingerprint == fingerprint:
+                return
+            version = publish_index(self.docs_dir, self.index_dir, fingerprint)
+            if version is not None:
+                self._swap(open_index(self.index_dir, version))
+            self.last_error = ""
+        except Exception as e:  # keep serving the previous version
+            self.last_error = str(e)
+            logger.exception("Index refresh failed for %s", self.docs_dir)
+        finally:
+            with self._refreshed:
+                self._refreshing = False
+                self._refresh_count += 1
+                self._refreshed.notify_all()
+
+    def _run(self) -> None:
+        try:
+            try:
+                published = open_index(self.index_dir)
+                if published is not None:
+                    self._swap(published)
+                    self._ready.set()
+            except Exception:
+                logger.exception("Could not open published index in %s", self.index_dir)
+            while not self._stopped.is_set():
+                self._refresh()
+                # Readers stop waiting after the first refresh even if it produced nothing.
+                self._ready.set()
+                self._wake.wait(self.watch_interval if self.watch_interval > 0 else None)
+                self._wake.clear()
+        finally:
+            # Also when stopped before the first refresh, so current() never waits forever.
+            self._ready.set()
+
+
+def corpus_dirs(corpus: str) -> tuple[Path, Path]:
+    """(docs_dir, index_dir) for a corpus name; ValueError for names that are not a plain folder name."""
+    if not _CORPUS_NAME.match(corpus or ""):
+        raise ValueError(f"Invalid corpus name: {corpus!r}")
+    docs_dir = DEFAULT_DOCS_DIR if corpus == DEFAULT_CORPUS else settings.corpora_dir / corpus
+    return docs_dir, settings.index_dir / corpus
+
+
+def remove_legacy_indexes(index_root: Path) -> list[str]:
+    """
+    Delete index versions left directly in INDEX_DIR by the single-corpus layout.
+
+    Indexes used to live in INDEX_DIR/<version> with INDEX_DIR/CURRENT; they now live
+    in INDEX_DIR/<corpus>/. A version folder is recognized by its manifest, which a
+    corpus folder never has. Returns the removed version names.
+    """
+    if not index_root.is_dir():
+        return []
+    removed = []
+    for path in index_root.iterdir():
+        if path.is_dir() and (path / MANIFEST_FILE).exists():
+            shutil.rmtree(path, ignore_errors=True)
+            removed.append(path.name)
+    (index_root / CURRENT_FILE).unlink(missing_ok=True)
+    if removed:
+        logger.info("Removed %d index version(s) from the old layout in %s", len(removed), index_root)
+    return removed
+
+
+def list_corpora() -> list[str]:
+    """The default corpus plus every folder in CORPORA_DIR."""
+    names = []
+    if settings.corpora_dir.is_dir():
+        names = sorted(p.name for p in settings.corpora_dir.iterdir() if p.is_dir() and _CORPUS_NAME.match(p.name))
+    return [DEFAULT_CORPUS] + [n for n in names if n != DEFAULT_CORPUS]
+
+
+class CorpusRegistry:
+    """
+    One IndexManager per corpus, created on first use and evicted least-recently-used.
+
+    Indexes are memory-mapped (chunk store and FAISS shards), so ``INDEX_MEMORY_CAP_MB``
+    bounds the total mapped size of the loaded indexes rather than Python heap; the
+    resident part is the pages searches have touched, shared through the page cache. When a load pushes the total
+    over the cap, the least recently used other corpora are stopped and dropped;
+    requests already holding one of their indexes keep it until they finish. A later
+    request re-opens the published version from disk, which only maps the files.
+    """
+
+    def __init__(self, memory_cap_mb: float | None = None):
+        cap = settings.index_memory_cap_mb if memory_cap_mb is None else memory_cap_mb
+        self.memory_cap_bytes = int(cap * 1024 * 1024)
+        self._managers: OrderedDict[str, IndexManager] = OrderedDict()
+        self._stats: dict[str, dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def manager(self, corpus: str | None = None) -> IndexManager:
+        """The corpus's IndexManager (created, not started, if not loaded); KeyError for unknown corpora."""
+        corpus = corpus or settings.corpus
+        with self._lock:
+            manager = self._managers.get(corpus)
+            if manager is not None:
+                self._managers.move_to_end(corpus)
+                return manager
+            docs_dir, index_dir = corpus_dirs(corpus)
+            if not docs_dir.is_dir() and not current_version(index_dir):
+                raise KeyError(f"Unknown corpus: {corpus}")
+            manager = self._managers[corpus] = IndexManager(docs_dir, index_dir)
+            self._stats.setdefault(corpus, {"hits": 0, "misses": 0, "loads": 0, "last_load_ms": 0, "evictions": 0})
+            return manager
+
+    def index(self, corpus: str | None = None, version: str = "", timeout: float | None = None) -> Optional[VectorIndex]:
+        """
+        The corpus's live index (or a specific still-published version), loading it if needed.
+
+        A request served by an index already in memory counts as a hit; one that had
+        to wait for a load counts as a miss and records the load time.
+        """
+        corpus = corpus or settings.corpus
+        manager = self.manager(corpus)
+        # A corpus whose first load already finished is a hit even when it has no index (no PDFs).
+        hit = manager.ready
+        start = time.perf_counter()
+        index = manager.get(version) if version else manager.current(timeout)
+        with self._lock:
+            stats = self._stats[corpus]
+            stats["hits" if hit else "misses"] += 1
+            if not hit and manager.nbytes:
+                stats["loads"] += 1
+                stats["last_load_ms"] = int((time.perf_counter() - start) * 1000)
+        self._evict(keep=corpus)
+        return index
+
+    def _evict(self, keep: str) -> None:
+        with self._lock:
+            total = sum(m.nbytes for m in self._managers.values())
+            for corpus, manager in list(self._managers.items()):
+                if total <= self.memory_cap_bytes:
+                    break
+                # Managers with nothing mapped free no memory; stopping them would only halt their loader.
+                if corpus == keep or manager.nbytes == 0:
+                    continue
+                self._managers.pop(corpus)
+                manager.stop()
+                total -= manager.nbytes
+                self._stats[corpus]["evictions"] += 1
+                logger.info("Evicted index for corpus %s (%d MB mapped)", corpus, manager.nbytes // 2**20)
+
+    def metrics(self) -> list[dict[str, Any]]:
+        """Per-corpus load time, mapped memory, hit rate and eviction counts, most recently used first."""
+        with self._lock:
+            rows = []
+            for corpus, stats in self._stats.items():
+                manager = self._managers.get(corpus)
+                requests = stats["hits"] + stats["misses"]
+                rows.append(
+                    {
+                        "corpus": corpus,
+                        "loaded": manager is not None and manager.nbytes > 0,
+                        "version": manager.version if manager is not None else "",
+                        "memory_mb": round((manager.nbytes if manager is not None else 0) / 2**20, 1),
+                        **stats,
+                        "hit_rate": round(stats["hits"] / requests, 3) if requests else 0.0,
+                    }
+                )
+            order = list(reversed(self._managers))
+            rows.sort(key=lambda r: order.index(r["corpus"]) if r["corpus"] in order else len(order))
+            return rows
+
+
+@lru_cache(maxsize=1)
+def get_corpus_registry() -> CorpusRegistry:
+    remove_legacy_indexes(settings.index_dir)
+    return CorpusRegistry()
+
+
+_managers: dict[tuple[Path, Path], IndexManager] = {}
+_managers_lock = threading.Lock()
+
+
+def get_index_manager(docs_dir: Path | None = None, index_dir: Path | None = None) -> IndexManager:
+    """
+    Process-wide IndexManager for a document folder (created on first use, not started).
+
+    Without arguments this is the manager of the configured corpus (CORPUS) from the registry.
+    """
+    if docs_dir is None and index_dir is None:
+        return get_corpus_registry().manager()
+    key = (Path(docs_dir or DEFAULT_DOCS_DIR), Path(index_dir or settings.index_dir / DEFAULT_CORPUS))
+    with _managers_lock:
+        if key not in _managers:
+            _managers[key] = IndexManager(*key)
+        return _managers[key]
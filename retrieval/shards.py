@@ -0,0 +1,123 @@
+"""Per-document shards: document metadata, metadata filters, and question routing.
+
+Each indexed PDF is its own FAISS shard, tagged with a doc type (collection) and
+a year. Filters select shards by source, doc type, or year. The router derives
+metadata from the question: a named source becomes a hard filter, while doc
+type and year only become preferences that boost those shards' hits. Keyword
+routing is too coarse to exclude a document outright.
+"""
+from __future__ import annotations
+
+import re
+from collections import Counter
+from typing import Any, Iterable
+
+# Collection name -> filename keywords that assign a document to it.
+DOC_TYPE_KEYWORDS: dict[str, tuple[str, ...]] = {
+    "policy": ("policy", "wording", "terms"),
+    "handbook": ("handbook", "fundamentals", "guide"),
+    "report": ("report", "outlook", "survey", "review"),
+}
+DEFAULT_DOC_TYPE = "other"
+
+# Collection name -> question words that route a query to it, matched as whole words
+# (plural forms included). Only strong signals are listed.
+ROUTING_KEYWORDS: dict[str, tuple[str, ...]] = {
+    "policy": (
+        "policy document",
+        "policy wording",
+        "policyholder",
+        "coverage",
+        "cover",
+        "excess",
+        "exclusion",
+        "endorsement",
+        "documentation",
+    ),
+    "handbook": ("fundamental", "basics", "definition", "glossary", "what is a", "what is an"),
+    "report": (
+        "market",
+        "growth",
+        "trend",
+        "outlook",
+        "industry",
+        "digitalisation",
+        "digitalization",
+        "invest",
+        "investment",
+        "investing",
+        "profitability",
+        "regulatory",
+    ),
+}
+
+_ROUTING_PATTERNS = {
+    doc_type: re.compile(r"\b(?:" + "|".join(re.escape(w) for w in words) + r")(?:s|es)?\b", re.IGNORECASE)
+    for doc_type, words in ROUTING_KEYWORDS.items()
+}
+# Cosine-score bonus per matched preference (doc type, year) when ranking hits.
+ROUTING_BOOST = 0.05
+
+_YEAR = re.compile(r"\b(19[89]\d|20[0-4]\d)\b")
+
+
+def describe_document(source: str, pages: Iterable[str]) -> dict[str, Any]:
+    """Return {"doc_type", "year"} for a PDF from its filename and first pages' text."""
+    name = source.lower()
+    doc_type = next(
+        (dt for dt, words in DOC_TYPE_KEYWORDS.items() if any(w in name for w in words)),
+        DEFAULT_DOC_TYPE,
+    )
+    year = None
+    match = _YEAR.search(name)
+    if match:
+        year = int(match.group(1))
+    else:
+        counts = Counter(int(y) for text in pages for y in _YEAR.findall(text))
+        if counts:
+            year = counts.most_common(1)[0][0]
+    return {"doc_type": doc_type, "year": year}
+
+
+def _as_set(value: Any) -> set[Any]:
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return set(value)
+    return {value}
+
+
+def matches(document: dict[str, Any], filters: dict[str, Any] | None) -> bool:
+    """True if document metadata satisfies every filter (each filter value may be a list)."""
+    if not filters:
+        return True
+    return all(document.get(key) in _as_set(value) for key, value in filters.items() if value not in (None, [], ()))
+
+
+def route_query(question: str, documents: list[dict[str, Any]]) -> tuple[dict[str, Any], dict[str, Any]]:
+    """
+    Derive (filters, preferences) from the question.
+
+    A document filename mentioned in the question pins the search to that source
+    (a hard filter). Otherwise collection keywords and explicit years become
+    preferences: every shard is still searched, and hits from matching shards are
+    ranked higher (see preference_boost). Only preferences that match at least one
+    indexed document are kept.
+    """
+    text = f" {question.lower()} "
+    named = [d["source"] for d in documents if d["source"].lower().rsplit(".", 1)[0].replace("_", " ") in text]
+    if named:
+        return {"source": named}, {}
+    prefer: dict[str, Any] = {}
+    doc_types = [dt for dt, pattern in _ROUTING_PATTERNS.items() if pattern.search(question)]
+    if doc_types and any(d["doc_type"] in doc_types for d in documents):
+        prefer["doc_type"] = doc_types
+    years = sorted({int(y) for y in _YEAR.findall(text)})
+    if years and any(d.get("year") in years for d in documents):
+        prefer["year"] = years
+    return {}, prefer
+
+
+def preference_boost(document: dict[str, Any], prefer: dict[str, Any] | None) -> float:
+    """Score bonus for a document: ROUTING_BOOST for each preference it matches."""
+    if not prefer:
+        return 0.0
+    return ROUTING_BOOST * sum(1 for key, value in prefer.items() if matches(document, {key: value}))
@@ -1,22 +1,44 @@
 """Document loading and FAISS vector search over insurance PDFs."""
 from __future__ import annotations
 
+import bisect
+import contextlib
+import hashlib
+import heapq
+import json
+import os
+import shutil
+import threading
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Optional
-
-from langchain_community.vectorstores import FAISS
-from langchain_core.documents import Document
-from langchain_openai import OpenAIEmbeddings
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from pypdf import PdfReader
+from typing import TYPE_CHECKING, Any, Iterator, Optional
 
 from config import PROJECT_ROOT, settings
 
+if TYPE_CHECKING:
+    # Heavy dependencies are imported inside the functions that use them so that
+    # importing this module (and agents.graph) stays cheap at startup.
+    from langchain_core.documents import Document
+
+    from .chunk_store import ChunkStore
+
+# Bump when the on-disk layout changes so stale indexes are rebuilt.
+INDEX_FORMAT = 7
+SHARDS_DIR = "shards"
+MANIFEST_FILE = "manifest.json"
+# index_dir/CURRENT names the live version directory (see publish_index).
+CURRENT_FILE = "CURRENT"
+VERSION_LENGTH = 12
+DEFAULT_DOCS_DIR = PROJECT_ROOT / "data" / "insurance_docs"
+
 
 def load_pdfs(docs_dir: Path | None = None) -> list[Document]:
     """Load PDFs from docs_dir (default: data/insurance_docs) and return LangChain Documents."""
+    from langchain_core.documents import Document
+    from pypdf import PdfReader
+
     if docs_dir is None:
-        docs_dir = PROJECT_ROOT / "data" / "insurance_docs"
+        docs_dir = DEFAULT_DOCS_DIR
     if not docs_dir.exists():
         return []
     documents: list[Document] = []
@@ -37,38 +59,370 @@ def load_pdfs(docs_dir: Path | None = None) -> list[Document]:
     return documents
 
 
-def build_vector_store(docs_dir: Path | None = None) -> Optional[FAISS]:
-    """Build FAISS index from PDFs. Requires OPENAI_API_KEY for embeddings."""
-    documents = load_pdfs(docs_dir)
-    if not documents:
-        return None
-    splitter = RecursiveCharacterTextSplitter(
-        chunk_size=800,
-        chunk_overlap=150,
-        length_function=len,
-    )
-    splits = splitter.split_documents(documents)
-    embeddings = OpenAIEmbeddings(
+@lru_cache(maxsize=2)
+def get_embeddings(ingest: bool = False):
+    """
+    Shared OpenAIEmbeddings client.
+
+    The request-time client (researcher queries, verifier claims) is bounded by
+    LLM_TIMEOUT_S and not retried by the SDK, like the chat client, so the graph's
+    node retry policy is the only retry layer. The ingest client keeps the SDK's
+    retries for the bulk index build, which runs outside the graph.
+    """
+    from langchain_openai import OpenAIEmbeddings
+
+    request_limits = {} if ingest else {"timeout": settings.llm_timeout_s, "max_retries": 0}
+    return OpenAIEmbeddings(
         model=settings.embedding_model,
         api_key=settings.openai_api_key,
+        base_url=settings.openai_base_url or None,
+        **request_limits,
+    )
+
+
+def corpus_fingerprint(docs_dir: Path) -> str:
+    """Hash of PDF names, sizes and mtimes plus embedding/chunking/guard settings; changes when the index is stale."""
+    from agents.guard import guard_fingerprint
+
+    from .chunker import encoding_name
+
+    h = hashlib.sha1(
+        f"{INDEX_FORMAT}|{settings.embedding_model}|{settings.chunk_tokens}|{settings.chunk_overlap_tokens}"
+        f"|{encoding_name()}|{guard_fingerprint()}".encode()
     )
-    return FAISS.from_documents(splits, embeddings)
+    for path in sorted(docs_dir.glob("*.pdf")):
+        st = path.stat()
+        h.update(f"|{path.name}|{st.st_size}|{st.st_mtime_ns}".encode())
+    return h.hexdigest()
+
+
+class VectorIndex:
+    """
+    Persisted per-document FAISS shards plus the compact chunk store holding chunk text and metadata.
+
+    Every PDF is one shard covering a contiguous range of chunk ids. ``documents``
+    lists the shards with their metadata (source, doc_type, year, start, end).
+    Chunks flagged by the prompt-injection guard are left out of the shards, so each
+    shard has an ids array mapping its vector positions to chunk ids.
+    """
+
+    def __init__(self, path: Path):
+        import faiss
+        import numpy as np
+
+        from .chunk_store import ChunkStore
+
+        self.path = Path(path)
+        self.manifest: dict[str, Any] = json.loads((self.path / MANIFEST_FILE).read_text(encoding="utf-8"))
+        self.chunks: ChunkStore = ChunkStore(self.path)
+        self.documents: list[dict[str, Any]] = self.manifest.get("documents", [])
+        # Memory-mapped so processes serving the same index share its vectors via the page cache.
+        # IO_FLAG_MMAP only maps IVF inverted lists; flat indexes need IO_FLAG_MMAP_IFC.
+        self.shards = [
+            faiss.read_index(str(self.path / doc["shard"]), faiss.IO_FLAG_MMAP_IFC | faiss.IO_FLAG_READ_ONLY)
+            for doc in self.documents
+        ]
+        self.shard_ids = [np.load(self.path / doc["ids"], mmap_mode="r") for doc in self.documents]
+        # Bytes mapped from disk; resident memory is at most this and is shared through the page cache.
+        self.nbytes = sum(f.stat().st_size for f in self.path.rglob("*") if f.is_file())
+
+    @property
+    def fingerprint(self) -> str:
+        return self.manifest.get("fingerprint", "")
+
+    @property
+    def version(self) -> str:
+        return self.manifest.get("version", self.path.name)
+
+    def embeddings(self, chunk_ids: list[int]):
+        """Stored (L2-normalized) embedding vectors for chunk_ids, as a float32 array."""
+        import numpy as np
+
+        starts = [doc["start"] for doc in self.documents]
+        out = np.empty((len(chunk_ids), self.shards[0].d if self.shards else 0), dtype="float32")
+        for row, chunk_id in enumerate(chunk_ids):
+            i = bisect.bisect_right(starts, chunk_id) - 1
+            ids = self.shard_ids[i]
+            pos = int(np.searchsorted(ids, chunk_id))
+            if pos >= len(ids) or ids[pos] != chunk_id:
+                raise KeyError(f"Chunk {chunk_id} has no vector (flagged at ingest)")
+            out[row] = self.shards[i].reconstruct(pos)
+        return out
+
+    def select(self, filters: dict[str, Any] | None = None) -> list[int]:
+        """Indices of the shards whose document metadata matches filters."""
+        from .shards import matches
+
+        return [i for i, doc in enumerate(self.documents) if matches(doc, filters)]
+
+    def search(
+        self,
+        query: str,
+        k: int = 8,
+        filters: dict[str, Any] | None = None,
+        prefer: dict[str, Any] | None = None,
+    ) -> list[tuple[int, float]]:
+        """
+        Return (chunk_id, cosine score) pairs for the k best chunks across the selected shards.
+
+        Hits from shards matching prefer are ranked with a small score bonus
+        (shards.preference_boost); the returned scores are the plain cosine scores.
+        """
+        import faiss
+        import numpy as np
+
+        from .shards import preference_boost
+
+        selected = [i for i in self.select(filters) if self.shards[i].ntotal]
+        if not selected:
+            return []
+        vec = np.asarray([get_embeddings().embed_query(query)], dtype="float32")
+        faiss.normalize_L2(vec)
+
+        def search_shard(i: int) -> list[tuple[int, float, float]]:
+            shard = self.shards[i]
+            scores, positions = shard.search(vec, min(k, shard.ntotal))
+            ids = self.shard_ids[i]
+            boost = preference_boost(self.documents[i], prefer)
+            return [(int(ids[j]), float(s), float(s) + boost) for j, s in zip(positions[0], scores[0]) if j >= 0]
+
+        # faiss releases the GIL during search, so shards are scanned in parallel.
+        hits = (
+            [search_shard(selected[0])]
+            if len(selected) == 1
+            else list(_search_pool().map(search_shard, selected))
+        )
+        best = heapq.nlargest(k, (hit for shard_hits in hits for hit in shard_hits), key=lambda h: h[2])
+        return [(chunk_id, score) for chunk_id, score, _ in best]
+
+
+@lru_cache(maxsize=1)
+def _search_pool():
+    from concurrent.futures import ThreadPoolExecutor
+
+    return ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 1), thread_name_prefix="shard-search")
+
+
+def _embedding_text(chunk: dict[str, Any]) -> str:
+    """Embed chunks together with their section heading so short chunks keep their context."""
+    section = chunk.get("section") or ""
+    if section and not chunk["text"].startswith(section):
+        return f"{section}\n{chunk['text']}"
+    return chunk["text"]
+
+
+def _write_index(path: Path, documents: list[Document], fingerprint: str, version: str) -> None:
+    import faiss
+    import numpy as np
+
+    from agents.guard import screen
+
+    from .chunk_store import FLAG_INJECTION, write_chunk_store
+    from .chunker import chunk_documents
+    from .shards import describe_document
+
+    chunks = chunk_documents(
+        documents,
+        chunk_tokens=settings.chunk_tokens,
+        overlap_tokens=settings.chunk_overlap_tokens,
+    )
+    # Screened once here: flagged chunks keep their flag in chunks.npy but get no vector,
+    # so searches never see them and requests pay nothing to exclude them.
+    for chunk, flagged in zip(chunks, screen([c["text"] for c in chunks])):
+        chunk["flags"] = FLAG_INJECTION if flagged else 0
+    count = write_chunk_store(path, chunks)
+    kept = np.flatnonzero([not c["flags"] for c in chunks]).astype("<u4")
+    if len(kept):
+        vectors = np.asarray(
+            get_embeddings(ingest=True).embed_documents([_embedding_text(chunks[i]) for i in kept]), dtype="float32"
+        )
+        faiss.normalize_L2(vectors)
+    else:
+        # Every chunk flagged: nothing to embed, the shards are empty.
+        vectors = np.empty((0, 1), dtype="float32")
+    dim = vectors.shape[1]
+
+    # Chunks come out grouped by source in load order, so each document is one contiguous id range.
+    pages_by_source: dict[str, list[str]] = {}
+    for d in documents:
+        pages_by_source.setdefault(d.metadata.get("source", "Unknown"), []).append(d.page_content)
+    doc_entries = []
+    start = 0
+    (path / SHARDS_DIR).mkdir(exist_ok=True)
+    while start < count:
+        source = chunks[start]["source"]
+        end = start
+        while end < count and chunks[end]["source"] == source:
+            end += 1
+        lo, hi = np.searchsorted(kept, [start, end])
+        shard = faiss.IndexFlatIP(dim)
+        shard.add(vectors[lo:hi])
+        shard_file = f"{SHARDS_DIR}/{len(doc_entries)}.faiss"
+        ids_file = f"{SHARDS_DIR}/{len(doc_entries)}.ids.npy"
+        faiss.write_index(shard, str(path / shard_file))
+        np.save(path / ids_file, kept[lo:hi])
+        doc_entries.append(
+            {
+                "source": source,
+                **describe_document(source, pages_by_source.get(source, [])[:3]),
+                "start": start,
+                "end": end,
+                "shard": shard_file,
+                "ids": ids_file,
+            }
+        )
+        start = end
+    manifest = {
+        "format": INDEX_FORMAT,
+        "version": version,
+        "fingerprint": fingerprint,
+        "embedding_model": settings.embedding_model,
+        "num_chunks": count,
+        "flagged_chunks": sum(1 for c in chunks if c["flags"]),
+        "documents": doc_entries,
+    }
+    (path / MANIFEST_FILE).write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+
+
+def _read_manifest(path: Path) -> dict[str, Any]:
+    try:
+        return json.loads((path / MANIFEST_FILE).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def current_version(index_dir: Path) -> str:
+    """Version name that index_dir/CURRENT points at, or "" if nothing is published yet."""
+    try:
+        return (index_dir / CURRENT_FILE).read_text(encoding="utf-8").strip()
+    except OSError:
+        return ""
+
+
+def open_index(index_dir: Path, version: str | None = None) -> Optional[VectorIndex]:
+    """Open a published index version (default: the current one); None if it is missing or outdated."""
+    version = version or current_version(index_dir)
+    if not version or _read_manifest(index_dir / version).get("format") != INDEX_FORMAT:
+        return None
+    return VectorIndex(index_dir / version)
+
+
+@contextlib.contextmanager
+def _build_lock(lock_path: Path) -> Iterator[None]:
+    """Exclusive cross-process lock on lock_path, held for the duration of the block."""
+    try:
+        import fcntl
+    except ImportError:  # Windows: no flock; concurrent builds still publish safely, just redundantly.
+        yield
+        return
+    with open(lock_path, "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def publish_index(docs_dir: Path, index_dir: Path, fingerprint: str | None = None) -> Optional[str]:
+    """
+    Make the index version for the current PDFs live and return its name (None if there are no PDFs).
+
+    A version directory is named after the corpus fingerprint and never modified once
+    written: it is built in a temporary directory and renamed into place, then
+    index_dir/CURRENT is replaced atomically. Readers holding an older version keep
+    using it undisturbed. The build runs under an exclusive lock file, so when several
+    processes notice the same change only one embeds the corpus and the others wait
+    for its manifest and publish that.
+    """
+    fingerprint = fingerprint or corpus_fingerprint(docs_dir)
+    version = fingerprint[:VERSION_LENGTH]
+    path = index_dir / version
+    index_dir.mkdir(parents=True, exist_ok=True)
+    suffix = f"{os.getpid()}-{threading.get_ident()}"
+    if not (path / MANIFEST_FILE).exists():
+        lock_path = index_dir / f".build-{version}.lock"
+        # One process builds (and pays for the embeddings); the others wait here for its manifest.
+        with _build_lock(lock_path):
+            try:
+                if not (path / MANIFEST_FILE).exists():
+                    documents = load_pdfs(docs_dir)
+                    if not documents:
+                        return None
+                    tmp_dir = index_dir / f".tmp-{version}-{suffix}"
+                    shutil.rmtree(tmp_dir, ignore_errors=True)
+                    _write_index(tmp_dir, documents, fingerprint, version)
+                    try:
+                        os.replace(tmp_dir, path)
+                    except OSError:
+                        # Another process published this version first (only possible without flock).
+                        shutil.rmtree(tmp_dir, ignore_errors=True)
+            finally:
+                # Safe to remove while held: anyone still waiting re-checks the manifest first.
+                lock_path.unlink(missing_ok=True)
+    previous = current_version(index_dir)
+    tmp_current = index_dir / f".{CURRENT_FILE}-{suffix}"
+    tmp_current.write_text(version, encoding="utf-8")
+    os.replace(tmp_current, index_dir / CURRENT_FILE)
+    # Keep the previous version for processes that have not swapped yet.
+    for old in index_dir.iterdir():
+        if old.is_dir() and not old.name.startswith(".") and old.name not in (version, previous):
+            shutil.rmtree(old, ignore_errors=True)
+    return version
+
+
+def build_vector_store(
+    docs_dir: Path | None = None,
+    index_dir: Path | None = None,
+    corpus: str | None = None,
+) -> Optional[VectorIndex]:
+    """
+    Return the live index for a corpus (default: CORPUS), or for explicit docs/index folders.
+
+    The first call for a corpus waits until its index is available (building one if
+    none was ever published). Later calls return immediately; changed PDFs are
+    re-indexed in the background and swapped in when ready.
+    """
+    from .index_manager import get_corpus_registry, get_index_manager
+
+    if docs_dir is None and index_dir is None:
+        return get_corpus_registry().index(corpus)
+    return get_index_manager(docs_dir, index_dir).current()
 
 
 def search_sources(
-    vector_store: Optional[FAISS],
+    vector_store: Optional[VectorIndex],
     query: str,
     k: int = 8,
+    filters: dict[str, Any] | None = None,
+    prefer: dict[str, Any] | None = None,
 ) -> list[dict[str, Any]]:
-    """Return list of source dicts with citation and note from FAISS similarity search."""
+    """
+    Return list of source dicts with citation and note from FAISS similarity search.
+
+    filters restricts the search to documents whose metadata matches, e.g.
+    {"doc_type": "policy"}, {"source": [...]} or {"year": [2022, 2023]}. prefer takes
+    the same keys but only ranks matching documents' hits higher. Chunks the
+    prompt-injection guard flagged at ingest are never returned.
+    """
     if vector_store is None:
         return []
-    docs = vector_store.similarity_search(query, k=k)
+    chunks = vector_store.chunks
+    hits = vector_store.search(query, k=k, filters=filters, prefer=prefer)
     sources = []
-    for i, doc in enumerate(docs):
-        meta = doc.metadata or {}
-        name = meta.get("source", "Unknown")
-        page = meta.get("page", "?")
-        citation = f"{name} | page {page} | chunk {i + 1}"
-        sources.append({"citation": citation, "note": doc.page_content[:500]})
+    for chunk_id, _score in hits:
+        page, char_offset, section = chunks.page(chunk_id), chunks.char_offset(chunk_id), chunks.section(chunk_id)
+        # Anchored on where the chunk starts in the PDF, so a citation names the same text in every run.
+        label = [chunks.source(chunk_id), f"page {page}", *([section] if section else []), f"char {char_offset}"]
+        # Only the 500-char preview is decoded; the full text stays in the mapped blob.
+        sources.append(
+            {
+                "citation": " | ".join(label),
+                "note": chunks.text(chunk_id, max_chars=500),
+                "chunk_id": chunk_id,
+                "page": page,
+                "char_offset": char_offset,
+                "section": section,
+                "n_tokens": chunks.n_tokens(chunk_id),
+            }
+        )
     return sources
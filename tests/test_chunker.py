@@ -0,0 +1,72 @@
+"""Section labels and offsets produced by the token chunker."""
+from __future__ import annotations
+
+import re
+import sys
+from pathlib import Path
+
+import pytest
+
+_root = Path(__file__).resolve().parent.parent
+if str(_root) not in sys.path:
+    sys.path.insert(0, str(_root))
+
+from retrieval import chunker
+
+
+class _WordEncoding:
+    """Stand-in for tiktoken (whose encoding files may not be downloadable here): one token per word or space run."""
+
+    _token = re.compile(r"\w+|[^\w\s]|\s+")
+
+    def encode_ordinary(self, text):
+        return self._token.findall(text)
+
+    def encode_ordinary_batch(self, texts):
+        return [self.encode_ordinary(t) for t in texts]
+
+    def decode(self, tokens):
+        return "".join(tokens)
+
+
+@pytest.fixture(autouse=True)
+def word_encoding(monkeypatch):
+    monkeypatch.setattr(chunker, "get_encoding", lambda: _WordEncoding())
+
+
+def test_heading_in_short_chunk_does_not_relabel_preceding_text():
+    text = "Some preamble sentence about the policy.\nEXCLUSIONS\nWe do not cover wear and tear."
+    chunks = chunker.chunk_pages([{"source": "p.pdf", "page": 1, "text": text}], chunk_tokens=200)
+    assert len(chunks) == 1
+    assert chunks[0]["text"].startswith("Some preamble")
+    assert chunks[0]["section"] == ""
+
+
+def test_chunk_after_heading_takes_its_section():
+    body = " ".join(["word"] * 60)
+    text = f"{body}\nEXCLUSIONS\nWe do not cover wear and tear."
+    chunks = chunker.chunk_pages([{"source": "p.pdf", "page": 1, "text": text}], chunk_tokens=200, min_tokens=50)
+    assert [c["section"] for c in chunks] == ["", "EXCLUSIONS"]
+    assert chunks[1]["char_offset"] == text.index("EXCLUSIONS")
+
+
+def test_carried_overlap_never_pushes_a_chunk_over_budget():
+    # 19-token lines fill a chunk; two of them (the overlap) plus the 99-token line would be 137 > 100.
+    short = " ".join(["short"] * 10)
+    text = "\n".join([short] * 7 + [" ".join(["long"] * 50)])
+    chunks = chunker.chunk_pages(
+        [{"source": "p.pdf", "page": 1, "text": text}], chunk_tokens=100, overlap_tokens=40, min_tokens=10
+    )
+    assert max(c["n_tokens"] for c in chunks) <= 100
+    assert chunks[-1]["text"].endswith("long")
+    # Overlap is still carried where it fits.
+    assert chunks[1]["text"].startswith(short + "\n" + short)
+
+
+def test_encoding_follows_the_chat_model(monkeypatch):
+    monkeypatch.setattr(chunker.settings, "model_main", "gpt-4.1-mini")
+    assert chunker.encoding_name() == "o200k_base"
+    monkeypatch.setattr(chunker.settings, "model_main", "gpt-3.5-turbo")
+    assert chunker.encoding_name() == "cl100k_base"
+    monkeypatch.setattr(chunker.settings, "model_main", "some-local-model")
+    assert chunker.encoding_name() == chunker.FALLBACK_ENCODING
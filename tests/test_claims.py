@@ -0,0 +1,50 @@
+"""Claim extraction covers the whole draft; verdicts rewrite only rejected claims."""
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+_root = Path(__file__).resolve().parent.parent
+if str(_root) not in sys.path:
+    sys.path.insert(0, str(_root))
+
+from agents.claims import NOT_FOUND, apply_verdicts, embedding_matchable, extract_claims
+
+DRAFT = {
+    "executive_summary": "Claims costs doubled. Automating motor claims triage reduces handling cost.",
+    "client_email": "Dear client,\nWhy did the claim cross the road?\nBest,\nTeam",
+    "action_items": [{"owner": "Ops", "task": "Cut fraud.", "due_date": "Q1", "confidence": "high"}],
+}
+
+
+def test_every_sentence_and_task_is_a_claim():
+    texts = [c["text"] for c in extract_claims(DRAFT)]
+    assert "Claims costs doubled." in texts
+    assert "Why did the claim cross the road?" in texts
+    assert "Dear client," in texts
+    assert "Cut fraud." in texts
+
+
+def test_short_claims_are_not_embedding_matchable():
+    claims = {c["text"]: c for c in extract_claims(DRAFT)}
+    assert not embedding_matchable(claims["Claims costs doubled."])
+    assert embedding_matchable(claims["Automating motor claims triage reduces handling cost."])
+
+
+def test_rejected_short_claims_are_replaced():
+    claims = extract_claims(DRAFT)
+    for c in claims:
+        c["status"] = "unsupported" if c["text"] in ("Claims costs doubled.", "Cut fraud.") else "adjudicated"
+    out = apply_verdicts(DRAFT, claims)
+    assert out["executive_summary"] == f"{NOT_FOUND} Automating motor claims triage reduces handling cost."
+    assert out["action_items"][0]["task"] == NOT_FOUND
+
+
+def test_claims_with_figures_dates_or_names_are_not_embedding_matchable():
+    for text in (
+        "EMEA motor claims cost rose 40% in 2023.",
+        "Motor claims handled by Allianz grew strongly.",
+        "Claims costs rose sharply in March across markets.",
+    ):
+        assert not embedding_matchable({"text": text})
+    assert embedding_matchable({"text": "We recommend automating triage and fraud screening first."})
@@ -0,0 +1,116 @@
+"""Checkpointed runs: resuming a failed run and expiring abandoned checkpoints (stubbed chat, no index)."""
+from __future__ import annotations
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+_root = Path(__file__).resolve().parent.parent
+if str(_root) not in sys.path:
+    sys.path.insert(0, str(_root))
+
+from agents import graph, planner, researcher, trace_store, verifier, writer
+from config import settings
+
+USAGE = {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15}
+DRAFT = {
+    "executive_summary": "Motor claims handling cost is rising.",
+    "client_email": "Dear client,\nMotor claims handling cost is rising.\nBest,\nTeam",
+    "action_items": [{"owner": "Ops", "task": "Automate triage", "due_date": "Q1", "confidence": "high"}],
+}
+
+
+class _Chat:
+    """Answers each agent by its system prompt; the verifier can be made to time out."""
+
+    def __init__(self):
+        self.calls: list[str] = []
+        self.verifier_down = False
+
+    def __call__(self, model, api_key, messages, temperature=0.0):
+        import httpx
+        import openai
+
+        system = messages[0]["content"]
+        agent = next(a for a in ("planner", "research analyst", "business writer", "verifier") if a in system)
+        self.calls.append(agent)
+        if agent == "verifier":
+            if self.verifier_down:
+                raise openai.APITimeoutError(request=httpx.Request("POST", "http://test/v1/chat/completions"))
+            return json.dumps({f"C{i}": "OK" for i in range(1, 20)}), USAGE
+        if agent == "business writer":
+            return json.dumps(DRAFT), USAGE
+        return "1. Research\n2. Write", USAGE
+
+
+class _Manager:
+    def start(self):
+        return self
+
+
+class _Registry:
+    def manager(self, corpus=None):
+        return _Manager()
+
+
+@pytest.fixture
+def chat(monkeypatch, tmp_path):
+    chat = _Chat()
+    for module in (planner, researcher, writer, verifier):
+        monkeypatch.setattr(module, "invoke_openai_chat", chat)
+    monkeypatch.setattr(researcher, "build_vector_store", lambda **kwargs: None)
+    monkeypatch.setattr(graph, "get_corpus_registry", lambda: _Registry())
+    monkeypatch.setattr(settings, "checkpoint_db", tmp_path / "checkpoints.db")
+    monkeypatch.setattr(settings, "trace_db", tmp_path / "traces.db")
+    monkeypatch.setattr(settings, "node_max_attempts", 1)
+    graph._get_workflow.cache_clear()
+    trace_store.get_trace_store.cache_clear()
+    yield chat
+    graph._get_workflow.cache_clear()
+    trace_store.get_trace_store.cache_clear()
+
+
+def _fail_in_verifier(chat) -> str:
+    chat.verifier_down = True
+    run_id = graph.new_run_id()
+    with pytest.raises(Exception):
+        graph.run_copilot("What drives motor claims cost?", "Reduce cost", run_id=run_id)
+    assert graph.is_resumable(run_id)
+    return run_id
+
+
+def test_run_failed_in_verifier_resumes_without_rerunning_earlier_steps(chat):
+    run_id = _fail_in_verifier(chat)
+    assert chat.calls == ["planner", "research analyst", "business writer", "verifier"]
+
+    chat.verifier_down = False
+    chat.calls.clear()
+    result = graph.resume_copilot(run_id)
+    assert chat.calls == ["verifier"]
+    assert [e["agent"] for e in result["trace"]] == ["planner", "researcher", "writer", "verifier"]
+    assert result["verified_output"]["executive_summary"] == DRAFT["executive_summary"]
+    assert not graph.is_resumable(run_id)
+
+
+def test_abandoned_runs_expire_after_max_age(chat):
+    old = _fail_in_verifier(chat)
+    recent = _fail_in_verifier(chat)
+    saver = graph._get_workflow().checkpointer
+    with saver.conn:
+        saver.conn.execute("UPDATE run_threads SET started_at = started_at - 8 * 86400 WHERE thread_id = ?", (old,))
+    assert graph.prune_checkpoints(saver, max_age_days=7) == 1
+    assert not graph.is_resumable(old)
+    assert graph.is_resumable(recent)
+
+
+def test_runs_without_a_start_time_are_dated_from_the_sweep(chat):
+    run_id = _fail_in_verifier(chat)
+    saver = graph._get_workflow().checkpointer
+    with saver.conn:
+        saver.conn.execute("DELETE FROM run_threads")
+    assert graph.prune_checkpoints(saver, max_age_days=7) == 0
+    assert graph.is_resumable(run_id)
+    assert graph.prune_checkpoints(saver, max_age_days=0) == 1
+    assert not graph.is_resumable(run_id)
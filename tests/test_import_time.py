@@ -0,0 +1,21 @@
+"""Cold imports of the entry points stay cheap and leave heavy dependencies unloaded."""
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import pytest
+
+_root = Path(__file__).resolve().parent.parent
+if str(_root) not in sys.path:
+    sys.path.insert(0, str(_root))
+
+from eval.bench_import_time import DEFAULT_BUDGET_MS, DEFAULT_TARGETS, profile_import, summarize
+
+
+@pytest.mark.parametrize("module", DEFAULT_TARGETS)
+def test_import_is_lazy(module: str) -> None:
+    # Best of two runs so a cold disk cache does not fail the budget.
+    total_ms, heavy = min((summarize(profile_import(module)) for _ in range(2)), key=lambda r: r[0])
+    assert heavy == [], f"{module} eagerly imports {', '.join(heavy)}"
+    assert total_ms < DEFAULT_BUDGET_MS, f"{module} took {total_ms:.0f} ms"
@@ -0,0 +1,122 @@
+"""CorpusRegistry hit/miss accounting and least-recently-used eviction."""
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import pytest
+
+_root = Path(__file__).resolve().parent.parent
+if str(_root) not in sys.path:
+    sys.path.insert(0, str(_root))
+
+from config import settings
+from retrieval import index_manager
+
+MB = 2**20
+
+
+class _FakeIndex:
+    def __init__(self, version):
+        self.version = version
+
+    def embeddings(self, chunk_ids):
+        return [[1.0] for _ in chunk_ids]
+
+
+class _FakeManager:
+    """IndexManager stand-in: "loads" on the first current() call, with a size per corpus."""
+
+    sizes: dict[str, int] = {}
+
+    def __init__(self, docs_dir, index_dir):
+        self.corpus = Path(index_dir).name
+        self.loaded = False
+        self.stopped = False
+
+    @property
+    def ready(self):
+        return self.loaded
+
+    @property
+    def nbytes(self):
+        return self.sizes[self.corpus] if self.loaded else 0
+
+    @property
+    def version(self):
+        return "v1" if self.nbytes else ""
+
+    def current(self, timeout=None):
+        self.loaded = True
+        return _FakeIndex(self.version) if self.nbytes else None
+
+    def get(self, version):
+        return self.current()
+
+    def stop(self):
+        self.stopped = True
+
+
+@pytest.fixture
+def registry(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "corpora_dir", tmp_path / "corpora")
+    monkeypatch.setattr(settings, "index_dir", tmp_path / "index")
+    monkeypatch.setattr(index_manager, "IndexManager", _FakeManager)
+    monkeypatch.setattr(_FakeManager, "sizes", {"a": 1 * MB, "b": 1 * MB, "c": 1 * MB, "empty": 0})
+    for name in _FakeManager.sizes:
+        (tmp_path / "corpora" / name).mkdir(parents=True)
+    return index_manager.CorpusRegistry(memory_cap_mb=2.5)
+
+
+def _stats(registry):
+    return {row["corpus"]: row for row in registry.metrics()}
+
+
+def test_first_request_is_a_miss_and_later_ones_hit(registry):
+    for _ in range(3):
+        registry.index("a")
+    stats = _stats(registry)["a"]
+    assert (stats["hits"], stats["misses"], stats["loads"]) == (2, 1, 1)
+    assert stats["hit_rate"] == pytest.approx(2 / 3, abs=1e-3)
+
+
+def test_corpus_without_index_is_a_miss_only_once(registry):
+    for _ in range(3):
+        assert registry.index("empty") is None
+    stats = _stats(registry)["empty"]
+    assert (stats["hits"], stats["misses"], stats["loads"]) == (2, 1, 0)
+
+
+def test_evicts_least_recently_used_corpus_over_the_cap(registry):
+    registry.index("a")
+    registry.index("b")
+    registry.index("a")
+    b = registry._managers["b"]
+    registry.index("c")
+    assert list(registry._managers) == ["a", "c"]
+    assert b.stopped
+    assert _stats(registry)["b"]["evictions"] == 1
+    # Coming back is a miss that loads the corpus again.
+    registry.index("b")
+    assert _stats(registry)["b"]["misses"] == 2
+
+
+def test_eviction_skips_corpora_with_nothing_mapped(registry):
+    registry.index("empty")
+    registry.index("a")
+    registry.index("b")
+    registry.index("c")
+    assert list(registry._managers) == ["empty", "b", "c"]
+    assert not registry._managers["empty"].stopped
+    assert _stats(registry)["empty"]["evictions"] == 0
+
+
+def test_verifier_lookup_does_not_count_as_a_request(registry, monkeypatch):
+    from agents import verifier
+
+    monkeypatch.setattr(verifier, "get_corpus_registry", lambda: registry)
+    registry.index("a")
+    state = {"corpus": "a", "index_version": "v1"}
+    assert verifier._stored_source_vectors(state, [{"chunk_id": 0}]) == [[1.0]]
+    stats = _stats(registry)["a"]
+    assert (stats["hits"], stats["misses"]) == (0, 1)
@@ -0,0 +1,40 @@
+"""Question routing: named sources are hard filters, keywords and years only preferences."""
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+_root = Path(__file__).resolve().parent.parent
+if str(_root) not in sys.path:
+    sys.path.insert(0, str(_root))
+
+from retrieval.shards import ROUTING_BOOST, preference_boost, route_query
+
+DOCUMENTS = [
+    {"source": "commercial_auto_insurance_policy.pdf", "doc_type": "policy", "year": 2020},
+    {"source": "global_insurance_market_report.pdf", "doc_type": "report", "year": 2023},
+    {"source": "insurance_handbook_fundamentals.pdf", "doc_type": "handbook", "year": None},
+]
+
+
+def test_named_source_is_a_hard_filter():
+    filters, prefer = route_query("Summarize the commercial auto insurance policy exclusions", DOCUMENTS)
+    assert filters == {"source": ["commercial_auto_insurance_policy.pdf"]}
+    assert prefer == {}
+
+
+def test_keywords_match_whole_words_only():
+    _, prefer = route_query("How can our marketing team explain deductibles after a fraud investigation?", DOCUMENTS)
+    assert prefer == {}
+    _, prefer = route_query("How do we recover costs?", DOCUMENTS)
+    assert prefer == {}
+    _, prefer = route_query("Which markets should we invest in?", DOCUMENTS)
+    assert prefer == {"doc_type": ["report"]}
+
+
+def test_doc_type_and_year_are_preferences_not_filters():
+    filters, prefer = route_query("What are the main drivers of commercial auto insurance premium growth in 2023?", DOCUMENTS)
+    assert filters == {}
+    assert prefer == {"doc_type": ["report"], "year": [2023]}
+    assert preference_boost(DOCUMENTS[1], prefer) == 2 * ROUTING_BOOST
+    assert preference_boost(DOCUMENTS[0], prefer) == 0.0
@@ -0,0 +1,38 @@
+"""Nearest-rank percentiles used by the trace report and the load test."""
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import pytest
+
+_root = Path(__file__).resolve().parent.parent
+if str(_root) not in sys.path:
+    sys.path.insert(0, str(_root))
+
+from eval.trace_report import percentile
+
+
+@pytest.mark.parametrize(
+    "n, q, expected",
+    [
+        (10, 50, 5),
+        (10, 90, 9),
+        (10, 99, 10),
+        (100, 50, 50),
+        (100, 99, 99),
+        (100, 100, 100),
+        (4, 25, 1),
+        (4, 75, 3),
+        (1, 99, 1),
+        (100, 7, 7),
+        (1000, 99.9, 999),
+    ],
+)
+def test_nearest_rank(n, q, expected):
+    assert percentile([float(v) for v in range(n, 0, -1)], q) == expected
+
+
+def test_edges():
+    assert percentile([], 50) == 0.0
+    assert percentile([3.0, 1.0, 2.0], 0) == 1.0
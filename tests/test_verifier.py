@@ -0,0 +1,124 @@
+"""Verifier node flow and adjudication parsing with a stubbed embedder and chat model."""
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+_root = Path(__file__).resolve().parent.parent
+if str(_root) not in sys.path:
+    sys.path.insert(0, str(_root))
+
+from agents import verifier
+from agents.claims import NOT_FOUND
+
+USAGE = {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15}
+
+SOURCES = [
+    {"citation": "ops.pdf | page 2 | chunk 1", "note": "Automating motor claims triage reduces handling cost."},
+    {"citation": "market.pdf | page 7 | chunk 2", "note": "Motor claims cost rose across European markets."},
+]
+
+DRAFT = {
+    "executive_summary": (
+        "Automating motor claims triage reduces handling cost. EMEA motor claims cost rose 40% in 2023."
+    ),
+    "client_email": "Dear client,\nMotor claims cost rose across European markets.\nBest regards,\nTeam",
+    "action_items": [{"owner": "Ops", "task": "Automating motor claims triage reduces handling cost.", "due_date": "Q1", "confidence": "high"}],
+}
+
+
+class _HashEmbeddings:
+    """Hashed bag-of-words vectors: identical texts score 1.0, related ones in between."""
+
+    def embed_documents(self, texts):
+        out = np.zeros((len(texts), 64), dtype="float32")
+        for row, text in enumerate(texts):
+            for word in re.findall(r"\w+", text.lower()):
+                out[row, int(hashlib.md5(word.encode()).hexdigest(), 16) % 64] += 1.0
+        return out.tolist()
+
+
+class _Chat:
+    """Records the claims it was asked about and answers with fixed verdicts."""
+
+    def __init__(self, reply=None):
+        self.claims: list[str] = []
+        self.reply = reply
+
+    def __call__(self, model, api_key, messages, temperature=0.0):
+        user = messages[-1]["content"]
+        claims = re.findall(r"^C(\d+): (.*)$", user, re.MULTILINE)
+        self.claims += [text for _, text in claims]
+        if self.reply is not None:
+            return self.reply, USAGE
+        verdicts = {}
+        for n, text in claims:
+            if "%" in text:
+                verdicts[f"C{n}"] = None
+            elif text.startswith(("Dear", "Best", "Team")):
+                verdicts[f"C{n}"] = "OK"
+            else:
+                verdicts[f"C{n}"] = "S2"
+        return json.dumps(verdicts), USAGE
+
+
+@pytest.fixture
+def chat(monkeypatch):
+    chat = _Chat()
+    monkeypatch.setattr(verifier, "get_embeddings", lambda *a, **k: _HashEmbeddings())
+    monkeypatch.setattr(verifier, "invoke_openai_chat", chat)
+    monkeypatch.setattr(verifier, "record_trace", lambda state, agent, notes, input, output, metrics: {"metrics": metrics})
+    return chat
+
+
+def _run(state_extra=None):
+    state = {"draft": DRAFT, "sources": SOURCES, "index_version": "", **(state_extra or {})}
+    return verifier.verifier_node(state)
+
+
+def test_supported_claims_match_and_specific_claims_are_adjudicated(chat):
+    out = _run()
+    claims = {c["text"]: c for c in out["verified_output"]["claims"]}
+    assert claims["Automating motor claims triage reduces handling cost."]["status"] == "matched"
+    assert claims["Automating motor claims triage reduces handling cost."]["citation"] == SOURCES[0]["citation"]
+    # High similarity to the market source, but the figures go to the LLM, which rejects them.
+    assert "EMEA motor claims cost rose 40% in 2023." in chat.claims
+    assert claims["EMEA motor claims cost rose 40% in 2023."]["status"] == "unsupported"
+    assert claims["Dear client,"]["status"] == "adjudicated"
+    assert "Automating motor claims triage reduces handling cost." not in chat.claims
+
+    verified = out["verified_output"]
+    assert verified["executive_summary"] == f"Automating motor claims triage reduces handling cost. {NOT_FOUND}"
+    assert verified["client_email"] == DRAFT["client_email"]
+    assert [s["citation"] for s in verified["sources"]] == [s["citation"] for s in SOURCES]
+    metrics = out["trace"][0]["metrics"]
+    assert (metrics["claims_unsupported"], metrics["errors"]) == (1, 0)
+
+
+def test_invalid_verdict_json_keeps_the_draft_and_counts_an_error(chat):
+    chat.reply = "not json"
+    out = _run()
+    assert out["verified_output"]["executive_summary"] == DRAFT["executive_summary"]
+    assert out["trace"][0]["metrics"]["errors"] == 1
+
+
+@pytest.mark.parametrize(
+    "reply, expected",
+    [
+        ('{"C1": "S2", "C2": "ok", "C3": null}', [(True, 1), (True, None), (False, None)]),
+        ('```json\n{"C1": "s1", "C2": "S9"}\n```', [(True, 0), (False, None), (False, None)]),
+        ("", [(False, None)] * 3),
+    ],
+)
+def test_adjudicate_parses_verdicts(chat, reply, expected):
+    chat.reply = reply
+    claims = [{"text": "a"}, {"text": "b"}, {"text": "c"}]
+    verdicts, usage = verifier._adjudicate(claims, [[0, 1]] * 3, SOURCES)
+    assert verdicts == expected
+    assert usage == USAGE